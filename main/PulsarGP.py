@@ -1,5 +1,7 @@
 import os
+import math
 import backend as be
+import multiprocessing
 import customtkinter as ctk
 from astropy.time import Time
 from matplotlib.figure import Figure
@@ -9,6 +11,9 @@ from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolb
 
 class App(ctk.CTkFrame):
 
+    # Opciones del menú "Modelo GP" -> valor de self.modo_gp
+    MODOS_GP = {"Tres GPs": "tres_gps", "Segmentado": "segmentado", "Fase": "fase"}
+
     def __init__(self, master):
         super().__init__(master, fg_color="#357878")
 
@@ -19,6 +24,15 @@ class App(ctk.CTkFrame):
         self.derfrecuencias_resultado = None
         self.toas_object_full = None
 
+        # "tres_gps": un GP por cada uno de f, ḟ y f̈ (derivadas por spline)
+        # "segmentado": como "tres_gps", pero con GPs locales entre huecos de observación
+        # "fase": un solo GP sobre la fase con derivadas analíticas
+        # Se elige con el menú "Modelo GP"
+        self.modo_gp = "tres_gps"
+        # Si es True, los hiperparámetros se marginalizan con MCMC (bandas más honestas, más lento);
+        # se activa con el interruptor "MCMC"
+        self.mcmc_gp = False
+
         self.plot_figure = None
         self.plot_canvas = None
 
@@ -231,7 +245,8 @@ class App(ctk.CTkFrame):
 
         time_unit_container = ctk.CTkFrame(master=params_frame, fg_color="transparent")
         time_unit_container.place(relx=0.5, rely=0.60, relwidth=0.9, anchor="n")
-        time_unit_container.grid_columnconfigure(0, weight=1)
+        time_unit_container.grid_columnconfigure((0, 1), weight=1)
+        time_unit_container.grid_columnconfigure(2, weight=0)
 
         time_unit_label = ctk.CTkButton(
             master=time_unit_container,
@@ -262,6 +277,48 @@ class App(ctk.CTkFrame):
         self.time_unit_menu.set("Segundo")
         self.time_unit_menu.grid(row=1, column=0, sticky="ew")
 
+        gp_mode_label = ctk.CTkButton(
+            master=time_unit_container,
+            text="Modelo GP",
+            font=("Baloo", 17, "bold"),
+            fg_color="#b8cfcf",
+            border_width=3,
+            border_color="#418080",
+            corner_radius=10,
+            text_color="#418080",
+            text_color_disabled="#418080",
+            state="disabled"
+        )
+        gp_mode_label.grid(row=0, column=1, sticky="ew", padx=(10, 0), pady=(0, 5))
+
+        self.gp_mode_menu = ctk.CTkOptionMenu(
+            master=time_unit_container,
+            font=("Baloo", 17, "bold"),
+            fg_color="#b8cfcf",
+            button_color="#b8cfcf",
+            button_hover_color="#a8bebe",
+            text_color="#418080",
+            dropdown_fg_color="#b8cfcf",
+            dropdown_text_color="#418080",
+            dropdown_hover_color="#a8bebe",
+            values=list(self.MODOS_GP),
+            command=self._cambiar_modo_gp
+        )
+        self.gp_mode_menu.set(next(k for k, v in self.MODOS_GP.items() if v == self.modo_gp))
+        self.gp_mode_menu.grid(row=1, column=1, sticky="ew", padx=(10, 0))
+
+        self.mcmc_switch = ctk.CTkSwitch(
+            master=time_unit_container,
+            text="MCMC",
+            font=("Baloo", 17, "bold"),
+            text_color="#418080",
+            progress_color="#418080",
+            button_color="#b8cfcf",
+            button_hover_color="#a8bebe",
+            command=self._cambiar_mcmc_gp
+        )
+        self.mcmc_switch.grid(row=1, column=2, padx=(10, 0))
+
         date_range_container = ctk.CTkFrame(master=params_frame, fg_color="transparent")
         date_range_container.place(relx=0.5, rely=0.75, relwidth=0.9, anchor="n")
         date_range_container.grid_columnconfigure((0, 1), weight=1)
@@ -324,59 +381,236 @@ class App(ctk.CTkFrame):
         )
         self.max_date_label.pack(side="left", padx=10)
 
+    def _cambiar_modo_gp(self, opcion):
+        """Actualiza self.modo_gp según la opción elegida en el menú."""
+        self.modo_gp = self.MODOS_GP[opcion]
+
+    def _cambiar_mcmc_gp(self):
+        """Actualiza self.mcmc_gp según el interruptor de MCMC."""
+        self.mcmc_gp = bool(self.mcmc_switch.get())
+
     def ejecutar_proceso(self):
         """
         Función principal que ejecuta toda la cadena de procesamiento y muestra el gráfico inicial.
         """
-        if self.toas_object_full is None or not self.par_file_path:
+        if not self.tim_file_path or not self.par_file_path:
             messagebox.showwarning("Archivos Faltantes", "Por favor, selecciona los archivos .tim y .par.")
             return
 
-        print("Iniciando procesamiento completo con el backend...")
         try:
-            # Guardamos los datos en variables de instancia para que sean accesibles por otras funciones
-            toas_object = self.toas_object_full
-            mjds = toas_object.get_mjds()
-            self.residuals_object, self.model_object = be.compute_residuals(self.par_file_path, toas_object)
-            
-            self.residuals_object, self.model_object = be.compute_residuals(self.par_file_path, toas_object)
-            self.clean_toas, clean_phase_res = be.eliminar_duplicados(mjds.value, self.residuals_object.phase_resids.value)
-            norm_toas, _, _ = be.normalizar_tiempos(self.clean_toas)
-            _, f_resid, df_resid, d2f_resid = be.frequency_residuals_func(self.clean_toas, clean_phase_res, n_points=norm_toas.size)
-            
-            self.f_res_Hz = f_resid / 86400.0
-            df_res_Hz = df_resid / (86400.0 ** 2)
-            d2f_res_Hz = d2f_resid / (86400.0 ** 3)
-
-            self.f_gp_model = be.entrenamiento_gp_model(norm_toas, self.f_res_Hz)
-            df_gp_model = be.entrenamiento_gp_model(norm_toas, df_res_Hz)
-            d2f_gp_model = be.entrenamiento_gp_model(norm_toas, d2f_res_Hz)
+            # Ventana de MJD elegida por el usuario, se aplica antes de residuos y GP
+            mjd_inicio, mjd_fin = self._leer_intervalo_mjd()
+            mjd_fin = self._reescanear_fin(mjd_fin)
 
-            f_base = self.model_object.F0.value
+            # Si desde la última ejecución solo se agregaron TOAs al .tim, se actualiza lo existente
+            if self._actualizar_incremental(mjd_inicio, mjd_fin):
+                self._mostrar_resultados("Se agregaron los TOAs nuevos al análisis anterior.")
+                return
 
-            self.f_total, self.f_err_up, self.f_err_down = be.obtener_frecuencia_total_y_errores(norm_toas, self.f_gp_model, f_base)
-            self.df_total, self.df_err_up, self.df_err_down = be.obtener_frecuencia_total_y_errores(norm_toas, df_gp_model, f_base=0.0)
-            self.d2f_total, self.d2f_err_up, self.d2f_err_down = be.obtener_frecuencia_total_y_errores(norm_toas, d2f_gp_model, f_base=0.0)
+            print("Iniciando procesamiento completo con el backend...")
 
-            self.tiempo_resultado = self.clean_toas
-            self.frecuencias_resultado = self.f_total
-            self.derfrecuencias_resultado = self.df_total
+            # La carga completa con PINT se hace recién aquí (al seleccionar solo se escanea el .tim)
+            self.toas_object_full = be.load_toas_sesion(self.tim_file_path, return_also_mjds=False)
 
-            self.selected_unit = self.time_unit_menu.get()
-            self.unit_map = {"Segundo": "s", "Milisegundo": "ms", "Microsegundo": "us", "Nanosegundo": "ns"}
-            unit_symbol = self.unit_map.get(self.selected_unit, "s")
-            
-            fig = be.plot_residuals(self.residuals_object, self.model_object, unit=unit_symbol)
-            self._draw_plot(fig)
-            self.toggle_plot_button.configure(text="Ver Modelo GP")
-            self.vista_actual = "residuos"
-
-            messagebox.showinfo("Proceso Completo", "Análisis finalizado. Se muestra el gráfico de residuos.")
+            # Guardamos los datos en variables de instancia para que sean accesibles por otras funciones
+            self.residuals_object, self.model_object = be.compute_residuals_sesion(
+                self.par_file_path, self.tim_file_path, mjd_inicio=mjd_inicio, mjd_fin=mjd_fin)
+            self.clean_toas, clean_phase_res, clean_phase_err = self._promediar_residuos(
+                self.residuals_object, self.model_object)
+
+            # La normalización se guarda para que las actualizaciones incrementales usen la misma
+            norm_toas, self.t_ref, self.t_scale = be.normalizar_tiempos(self.clean_toas)
+
+            if self.modo_gp == "fase" and self.mcmc_gp:
+                # Mezcla de GPs de fase sobre el posterior de los hiperparámetros
+                self.phase_gp_model = be.entrenamiento_gp_mcmc(norm_toas, clean_phase_res, kernel="rbf")
+                self.f_gp_model, df_gp_model, d2f_gp_model = [
+                    self.phase_gp_model.derivada(orden, (self.t_scale * 86400.0) ** -orden) for orden in (1, 2, 3)]
+            elif self.modo_gp == "fase":
+                # Un solo GP sobre la fase: f, ḟ y f̈ son sus derivadas analíticas (en Hz, Hz/s y Hz/s²)
+                self.phase_gp_model, (self.f_gp_model, df_gp_model, d2f_gp_model) = be.derivadas_gp_fase(
+                    norm_toas, clean_phase_res, self.t_scale, motor="auto")
+            else:
+                series = self._residuos_frecuencia(self.clean_toas, clean_phase_res, clean_phase_err)
+                self.f_res_Hz = series[0]
+
+                if self.mcmc_gp:
+                    # Cada serie se marginaliza por separado; las cadenas usan un pool de procesos
+                    self.f_gp_model, df_gp_model, d2f_gp_model = [
+                        be.entrenamiento_gp_mcmc(norm_toas, serie, motor="auto") for serie in series]
+                elif self.modo_gp == "segmentado":
+                    # Un GP local por segmento y serie, todos en paralelo, mezclados en las fronteras
+                    self.f_gp_model, df_gp_model, d2f_gp_model = be.entrenamiento_gp_segmentado(
+                        norm_toas, series, motor="auto")
+                else:
+                    # Los tres GPs son independientes: se entrenan en paralelo
+                    # (con muchos TOAs se usa automáticamente el GP sparse). Los modelos ya
+                    # optimizados se reutilizan desde el almacén en disco.
+                    self.f_gp_model, df_gp_model, d2f_gp_model = be.entrenamiento_gp_paralelo(
+                        norm_toas, series, motor="auto",
+                        nombre_pulsar=self.model_object.PSR.value, etiquetas=["f", "df", "d2f"])
+
+            self.gp_models = [self.f_gp_model, df_gp_model, d2f_gp_model]
+            self._predecir_frecuencias(norm_toas)
+            self._ultima_ejecucion = (self.tim_file_path, self.par_file_path, mjd_inicio, mjd_fin, self.modo_gp)
+
+            self._mostrar_resultados("Análisis finalizado. Se muestra el gráfico de residuos.")
 
         except Exception as e:
             messagebox.showerror("Error en el Backend", f"Ocurrió un error durante el procesamiento:\n{e}")
             print(f"Error en el backend: {e}")
 
+    def _promediar_residuos(self, residuals_object, model_object):
+        """
+        Promedia por época los residuos de fase de residuals_object (reduce el n del GP sin
+        perder información). Retorna (MJD, fase, error de fase).
+        """
+        toas_object = residuals_object.toas
+        mjds = toas_object.get_mjds()
+
+        # Errores de fase (ciclos) para promediar épocas y ponderar el spline de mínimos cuadrados
+        phase_err = toas_object.get_errors().to_value("s") * model_object.F0.value
+        return be.promediar_epocas(mjds.value, residuals_object.phase_resids.value, phase_err)
+
+    def _residuos_frecuencia(self, clean_toas, clean_phase_res, clean_phase_err):
+        """Residuos de f, ḟ y f̈ (Hz, Hz/s, Hz/s²) derivando la fase con el spline de mínimos cuadrados."""
+        _, f_resid, df_resid, d2f_resid = be.frequency_residuals_func(
+            clean_toas, clean_phase_res, n_points=clean_toas.size, method='lsq', errores=clean_phase_err)
+
+        return [f_resid / 86400.0, df_resid / (86400.0 ** 2), d2f_resid / (86400.0 ** 3)]
+
+    def _actualizar_incremental(self, mjd_inicio, mjd_fin):
+        """
+        Si desde la última ejecución el .tim solo creció (mismos archivos y modo, intervalo abierto
+        al final; ver `_reescanear_fin`), carga solo los TOAs nuevos, extiende los residuos y
+        actualiza los GPs con hiperparámetros fijos (se reoptimizan solo si los datos nuevos se
+        apartan del modelo).
+        Retorna False si hay que hacer el proceso completo.
+        """
+        previa = getattr(self, "_ultima_ejecucion", None)
+        if (previa != (self.tim_file_path, self.par_file_path, mjd_inicio, mjd_fin, self.modo_gp)
+                or mjd_fin is not None or self.modo_gp == "segmentado" or self.mcmc_gp):
+            return False
+
+        try:
+            toas_nuevas, toas_todas = be.cargar_toas_nuevas(self.tim_file_path, self.toas_object_full)
+        except ValueError:
+            return False
+        if toas_nuevas is None:
+            return False
+
+        # Todo se calcula en variables locales: si algún paso falla, el análisis anterior queda intacto
+        print(f"Actualización incremental con {toas_nuevas.ntoas} TOAs nuevos...")
+        residuals_object, model_object = be.compute_residuals(
+            self.par_file_path, be.recortar_toas(toas_todas, mjd_inicio, mjd_fin), model=self.model_object)
+        clean_toas, clean_phase_res, clean_phase_err = self._promediar_residuos(residuals_object, model_object)
+        norm_toas = ((clean_toas - self.t_ref) / self.t_scale).reshape(-1, 1)
+
+        phase_gp_model = getattr(self, "phase_gp_model", None)
+        f_res_Hz = getattr(self, "f_res_Hz", None)
+        try:
+            if self.modo_gp == "fase":
+                phase_gp_model, info = be.actualizar_gp_incremental(phase_gp_model, norm_toas, clean_phase_res)
+                print(f"GP de fase: {info['motivo']} (χ² reducido {info['chi2_reducido']:.2f})")
+                gp_models = [be.DerivadaGP(phase_gp_model, orden, escala=(self.t_scale * 86400.0) ** -orden)
+                             for orden in (1, 2, 3)]
+            else:
+                series = self._residuos_frecuencia(clean_toas, clean_phase_res, clean_phase_err)
+                f_res_Hz = series[0]
+                gp_models = []
+                for etiqueta, modelo, serie in zip(("f", "df", "d2f"), self.gp_models, series):
+                    modelo, info = be.actualizar_gp_incremental(modelo, norm_toas, serie)
+                    print(f"GP de {etiqueta}: {info['motivo']} (χ² reducido {info['chi2_reducido']:.2f})")
+                    gp_models.append(modelo)
+        except ValueError:
+            # Los TOAs nuevos cambiaron épocas ya promediadas: se hace el proceso completo
+            return False
+
+        self.toas_object_full = toas_todas
+        self.residuals_object, self.model_object = residuals_object, model_object
+        self.clean_toas, self.f_res_Hz = clean_toas, f_res_Hz
+        self.phase_gp_model, self.gp_models = phase_gp_model, gp_models
+        self.f_gp_model = gp_models[0]
+        self._predecir_frecuencias(norm_toas)
+        return True
+
+    def _predecir_frecuencias(self, norm_toas):
+        """Calcula f, ḟ y f̈ con sus bandas de error a partir de self.gp_models."""
+        f_gp_model, df_gp_model, d2f_gp_model = self.gp_models
+        f_base = self.model_object.F0.value
+
+        self.f_total, self.f_err_up, self.f_err_down = be.obtener_frecuencia_total_y_errores(norm_toas, f_gp_model, f_base)
+        self.df_total, self.df_err_up, self.df_err_down = be.obtener_frecuencia_total_y_errores(norm_toas, df_gp_model, f_base=0.0)
+        self.d2f_total, self.d2f_err_up, self.d2f_err_down = be.obtener_frecuencia_total_y_errores(norm_toas, d2f_gp_model, f_base=0.0)
+
+        # Índice de frenado con errores: método delta y banda de Monte Carlo a partir de las bandas del GP.
+        # En modo fase f, ḟ y f̈ son derivadas del mismo GP y se usa su covarianza conjunta
+        sigmas = [(arriba - abajo) / 2 for arriba, abajo in ((self.f_err_up, self.f_err_down),
+                                                             (self.df_err_up, self.df_err_down),
+                                                             (self.d2f_err_up, self.d2f_err_down))]
+        covarianza = None
+        if self.modo_gp == "fase":
+            _, covarianza = be.covarianza_derivadas_gp(self.gp_models, norm_toas)
+        self.n_total, self.n_sigma = be.error_indice_frenado(self.f_total, self.df_total, self.d2f_total, *sigmas,
+                                                             covarianza=covarianza)
+        _, self.n_err_up, self.n_err_down = be.indice_frenado_monte_carlo(
+            self.f_total, self.df_total, self.d2f_total, *sigmas, covarianza=covarianza)
+
+        self.tiempo_resultado = self.clean_toas
+        self.frecuencias_resultado = self.f_total
+        self.derfrecuencias_resultado = self.df_total
+
+    def _mostrar_resultados(self, mensaje):
+        """Dibuja el gráfico de residuos y avisa que terminó el proceso."""
+        self.selected_unit = self.time_unit_menu.get()
+        self.unit_map = {"Segundo": "s", "Milisegundo": "ms", "Microsegundo": "us", "Nanosegundo": "ns"}
+        unit_symbol = self.unit_map.get(self.selected_unit, "s")
+
+        fig = be.plot_residuals(self.residuals_object, self.model_object, unit=unit_symbol)
+        self._draw_plot(fig)
+        self.toggle_plot_button.configure(text="Ver Modelo GP")
+        self.vista_actual = "residuos"
+
+        messagebox.showinfo("Proceso Completo", mensaje)
+
+    def _reescanear_fin(self, mjd_fin):
+        """
+        Vuelve a escanear el .tim (pudo crecer desde que se eligió) y actualiza el máximo mostrado.
+        Un final igual al máximo del escaneo anterior es el valor por defecto, "hasta el último TOA":
+        se retorna None para que los TOAs agregados no queden fuera del intervalo.
+        """
+        anterior = getattr(self, "_mjd_max_escaneado", None)
+        resumen = be.escanear_tim(self.tim_file_path)
+        if resumen["ntoas"] == 0:
+            return mjd_fin
+
+        max_mjd = math.ceil(resumen["mjd_max"] * 1e4) / 1e4
+        self._mjd_max_escaneado = max_mjd
+        self.max_date_label.configure(text=f"Max: {max_mjd:.4f}")
+
+        if mjd_fin is None or anterior is None or round(mjd_fin, 4) != anterior:
+            return mjd_fin
+
+        self.end_mjd_entry.delete(0, "end")
+        self.end_mjd_entry.insert(0, f"{max_mjd:.4f}")
+        return None
+
+    def _leer_intervalo_mjd(self):
+        """
+        Lee los campos de inicio/final del intervalo. Un campo vacío significa sin límite.
+        """
+        limites = []
+        for entry in (self.start_mjd_entry, self.end_mjd_entry):
+            texto = entry.get().strip().replace(",", ".")
+            if not texto:
+                limites.append(None)
+                continue
+            try:
+                limites.append(float(texto))
+            except ValueError:
+                raise ValueError(f"'{texto}' no es un MJD válido.")
+        return tuple(limites)
+
     def validate_digits(self, text, max_length):
         return text.isdigit() and len(text) <= max_length
     
@@ -432,7 +666,11 @@ class App(ctk.CTkFrame):
                     df_err_down=self.df_err_down,
                     d2f=self.d2f_total,
                     d2f_err_up=self.d2f_err_up,
-                    d2f_err_down=self.d2f_err_down
+                    d2f_err_down=self.d2f_err_down,
+                    n=self.n_total,
+                    n_err_up=self.n_err_up,
+                    n_err_down=self.n_err_down,
+                    n_sigma=self.n_sigma
                 )
                 messagebox.showinfo("Éxito", f"Archivo de resultados completo guardado en:\n{filepath}")
 
@@ -476,10 +714,10 @@ class App(ctk.CTkFrame):
         try:
             print(f"Cargando archivo .tim: {filepath}")
             self.tim_file_path = filepath
-            mjds, _ = be.load_toas(self.tim_file_path, return_also_mjds=True)
+            resumen = be.escanear_tim(self.tim_file_path)
 
-            min_date = Time(mjds.min(), format='mjd').to_datetime().strftime('%d-%m-%Y')
-            max_date = Time(mjds.max(), format='mjd').to_datetime().strftime('%d-%m-%Y')
+            min_date = Time(resumen["mjd_min"], format='mjd').to_datetime().strftime('%d-%m-%Y')
+            max_date = Time(resumen["mjd_max"], format='mjd').to_datetime().strftime('%d-%m-%Y')
 
             self.min_date_label.configure(text=f"Min: {min_date}")
             self.max_date_label.configure(text=f"Max: {max_date}")
@@ -533,22 +771,25 @@ class App(ctk.CTkFrame):
 
         print("Ambos archivos seleccionados. Actualizando rango de fechas MJD...")
         try:
-            mjds, self.toas_object_full = be.load_toas(self.tim_file_path)
+            # Escaneo rápido del .tim, la carga con PINT se difiere hasta ejecutar el proceso
+            resumen = be.escanear_tim(self.tim_file_path)
 
-            if len(self.toas_object_full) == 0: return
+            if resumen["ntoas"] == 0: return
 
-            min_mjd = mjds.min().value
-            max_mjd = mjds.max().value
+            # Se redondea hacia afuera para que la ventana por defecto incluya todos los TOAs
+            min_mjd = math.floor(resumen["mjd_min"] * 1e4) / 1e4
+            max_mjd = math.ceil(resumen["mjd_max"] * 1e4) / 1e4
             
             self.min_date_label.configure(text=f"Min: {min_mjd:.4f}")
             self.max_date_label.configure(text=f"Max: {max_mjd:.4f}")
+            self._mjd_max_escaneado = max_mjd
 
             self.start_mjd_entry.delete(0, "end")
             self.end_mjd_entry.delete(0, "end")
             self.start_mjd_entry.insert(0, f"{min_mjd:.4f}")
             self.end_mjd_entry.insert(0, f"{max_mjd:.4f}")
             
-            print("Rango de fechas MJD y campos de texto actualizados.")
+            print(f"Rango de fechas MJD y campos de texto actualizados ({resumen['ntoas']} TOAs).")
 
         except Exception as e:
             messagebox.showerror("Error al Cargar Archivo .tim", f"No se pudo procesar el archivo para obtener las fechas:\n{e}")
@@ -651,10 +892,28 @@ class App(ctk.CTkFrame):
             toolbar2.update()
             canvas2.get_tk_widget().pack(side="top", fill="both", expand=True)
 
+            # --- Generar y mostrar el tercer gráfico (índice de frenado con su banda) ---
+            fig3 = be.big_beautiful_graph(
+                self.clean_toas, self.df_total, self.d2f_total, self.n_total,
+                braking_err_arriba=self.n_err_up, braking_err_abajo=self.n_err_down
+            )
+
+            window3 = ctk.CTkToplevel(self)
+            window3.title("Índice de Frenado")
+            window3.geometry("700x900")
+
+            canvas3 = FigureCanvasTkAgg(fig3, master=window3)
+            toolbar3 = NavigationToolbar2Tk(canvas3, window3)
+            toolbar3.update()
+            canvas3.get_tk_widget().pack(side="top", fill="both", expand=True)
+
         except Exception as e:
             messagebox.showerror("Error al Graficar", f"No se pudo generar los gráficos:\n{e}")
 
 if __name__ == "__main__":
+    # Necesario para los procesos de entrenamiento en el ejecutable de PyInstaller
+    multiprocessing.freeze_support()
+
     root = TkinterDnD.Tk()
     root.title("PulsarGP")
     root.geometry("1280x720")
@@ -665,4 +924,4 @@ if __name__ == "__main__":
     app = App(master=root)
     app.pack(expand=True, fill="both")
 
-    root.mainloop()
\ No newline at end of file
+    root.mainloop()
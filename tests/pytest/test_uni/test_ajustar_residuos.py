@@ -0,0 +1,52 @@
+import os
+import yaml
+import numpy as np
+from datetime import datetime
+from main.backend import load_toas, compute_residuals, ajustar_residuos
+
+def test_ajustar_residuos():
+    config_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "config.yaml"))
+    with open(config_path, "r") as f:
+        config = yaml.safe_load(f)
+
+    files_dir = os.path.abspath(config["paths"]["files_dir"])
+    logs_dir = os.path.abspath(os.path.join(config["paths"]["logs_dir"], "ajustar_residuos"))
+    os.makedirs(logs_dir, exist_ok=True)
+
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    log_path = os.path.join(logs_dir, f"log_ajustar_residuos_{timestamp}.txt")
+    log_lines = []
+
+    tim_path = os.path.join(files_dir, "psr04.tim")
+    par_path = os.path.join(files_dir, "psr04.par")
+
+    try:
+        toas = load_toas(tim_path, return_also_mjds=False)
+        prefit, model = compute_residuals(par_path, toas)
+
+        for fitter in ("wls", "gls"):
+            postfit, model_ajustado, info = ajustar_residuos(toas, model, fitter=fitter)
+
+            assert postfit.time_resids.shape == prefit.time_resids.shape, "Cambió el número de residuos."
+            assert info["chi2"] <= prefit.chi2 * (1 + 1e-6), f"El ajuste {fitter} empeoró el chi²."
+            assert model_ajustado is not model, "El modelo original fue modificado."
+            assert np.isfinite(model_ajustado.F0.uncertainty_value), "No se calculó la incertidumbre de F0."
+            log_lines.append(f"{fitter}: chi² {prefit.chi2:.3f} -> {info['chi2']:.3f} en {info['iteraciones']} iteraciones.")
+
+            # Con los fitters de PINT se informan las iteraciones realmente hechas
+            _, _, info_pint = ajustar_residuos(toas, model, fitter=fitter, maxiter=10, reusar_matriz=False)
+            assert 1 <= info_pint["iteraciones"] < 10, f"Iteraciones del fitter {fitter} de PINT incorrectas."
+            assert np.isclose(info_pint["chi2"], info["chi2"], rtol=1e-2), f"El chi² {fitter} no coincide con el de PINT."
+
+        postfit, _ = compute_residuals(par_path, toas, fitter="wls")
+        assert postfit.time_resids.shape[0] == toas.ntoas, "compute_residuals con fitter no retornó residuos post-fit."
+
+        log_lines.append("La función ajustar_residuos pasó la prueba unitaria.")
+
+    except AssertionError as e:
+        log_lines.append(str(e))
+        raise
+
+    finally:
+        with open(log_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(log_lines))
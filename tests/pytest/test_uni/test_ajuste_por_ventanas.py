@@ -0,0 +1,55 @@
+import os
+import yaml
+import numpy as np
+from datetime import datetime
+from main.backend import load_toas, compute_residuals, ajuste_por_ventanas
+
+def test_ajuste_por_ventanas():
+    config_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "config.yaml"))
+    with open(config_path, "r") as f:
+        config = yaml.safe_load(f)
+
+    files_dir = os.path.abspath(config["paths"]["files_dir"])
+    logs_dir = os.path.abspath(os.path.join(config["paths"]["logs_dir"], "ajuste_por_ventanas"))
+    os.makedirs(logs_dir, exist_ok=True)
+
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    log_path = os.path.join(logs_dir, f"log_ajuste_por_ventanas_{timestamp}.txt")
+    log_lines = []
+
+    tim_path = os.path.join(files_dir, "psr04.tim")
+    par_path = os.path.join(files_dir, "psr04.par")
+
+    try:
+        toas = load_toas(tim_path, return_also_mjds=False)
+        _, model = compute_residuals(par_path, toas)
+
+        resultado = ajuste_por_ventanas(par_path, toas, ancho=150.0, paso=50.0, min_toas=8, model=model, n_procesos=2)
+        n_ventanas = resultado["mjd"].size
+        log_lines.append(f"Se ajustaron {n_ventanas} ventanas.")
+        assert n_ventanas >= 3, "Se esperaban varias ventanas."
+        for clave in ("F0", "F0_err", "F1", "F1_err", "F2", "F2_err", "n", "n_err", "chi2_reducido"):
+            assert resultado[clave].shape == (n_ventanas,), f"Columna {clave} con forma incorrecta."
+        assert np.all(resultado["n_toas"] >= 8), "Ventana con menos TOAs que min_toas."
+
+        # ν local en el centro de cada ventana frente a la serie de Taylor del modelo global
+        dt = (resultado["mjd"] - model.PEPOCH.value) * 86400.0
+        f0, f1, f2 = (float(model[p].value) for p in ("F0", "F1", "F2"))
+        esperado = f0 + f1 * dt + f2 * dt ** 2 / 2
+        desvio = np.abs(resultado["F0"] - esperado) / resultado["F0_err"]
+        log_lines.append(f"Desvío máximo de F0 local: {np.nanmax(desvio):.2f} σ")
+        assert np.all(resultado["F0_err"] > 0) and np.nanmax(desvio) < 10, "F0 local incompatible con el modelo global."
+        assert np.all(np.sign(resultado["F1"]) == np.sign(f1)), "F1 local con signo incorrecto."
+
+        serie = ajuste_por_ventanas(par_path, toas, ancho=150.0, paso=50.0, min_toas=8, model=model, n_procesos=1)
+        assert np.allclose(serie["F1"], resultado["F1"], equal_nan=True), "El ajuste en paralelo no coincide con el serial."
+
+        log_lines.append("La función ajuste_por_ventanas pasó la prueba unitaria.")
+
+    except AssertionError as e:
+        log_lines.append(str(e))
+        raise
+
+    finally:
+        with open(log_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(log_lines))
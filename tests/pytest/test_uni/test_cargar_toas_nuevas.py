@@ -0,0 +1,59 @@
+import os
+import yaml
+import shutil
+import numpy as np
+from datetime import datetime
+from main.backend import cargar_toas_nuevas, load_toas
+
+def test_cargar_toas_nuevas():
+    config_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "config.yaml"))
+    with open(config_path, "r") as f:
+        config = yaml.safe_load(f)
+
+    files_dir = os.path.abspath(config["paths"]["files_dir"])
+    logs_dir = os.path.abspath(os.path.join(config["paths"]["logs_dir"], "cargar_toas_nuevas"))
+    os.makedirs(logs_dir, exist_ok=True)
+
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    log_path = os.path.join(logs_dir, f"log_cargar_toas_nuevas_{timestamp}.txt")
+    tim_parcial = os.path.join(logs_dir, f"parcial_{timestamp}.tim")
+    log_lines = []
+
+    tim_path = os.path.join(files_dir, "psr04.tim")
+
+    try:
+        assert os.path.exists(tim_path), f"Archivo .tim no encontrado: {tim_path}"
+
+        # Versión anterior del archivo: sin sus últimas 10 líneas de TOAs
+        with open(tim_path, "r") as f:
+            lineas = f.readlines()
+        with open(tim_parcial, "w") as f:
+            f.writelines(lineas[:-10])
+
+        toas_previas = load_toas(tim_parcial, return_also_mjds=False, use_cache=False)
+        toas_completas = load_toas(tim_path, return_also_mjds=False, use_cache=False)
+
+        shutil.copyfile(tim_path, tim_parcial)
+        toas_nuevas, toas_todas = cargar_toas_nuevas(tim_parcial, toas_previas)
+
+        assert toas_nuevas is not None and toas_nuevas.ntoas == toas_completas.ntoas - toas_previas.ntoas, "Número de TOAs nuevos incorrecto."
+        assert toas_todas.ntoas == toas_completas.ntoas, "La unión no tiene todos los TOAs."
+        assert np.allclose(toas_todas.get_mjds().value, toas_completas.get_mjds().value), "Los MJDs de la unión no coinciden."
+        log_lines.append(f"Se cargaron {toas_nuevas.ntoas} TOAs nuevos.")
+
+        # Sin cambios en el archivo no hay TOAs nuevos
+        sin_nuevas, _ = cargar_toas_nuevas(tim_parcial, toas_todas)
+        assert sin_nuevas is None, "Se detectaron TOAs nuevos en un archivo sin cambios."
+
+        log_lines.append("La función cargar_toas_nuevas pasó la prueba unitaria.")
+
+    except AssertionError as e:
+        log_lines.append(str(e))
+        raise
+
+    finally:
+        with open(log_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(log_lines))
+
+        if os.path.exists(tim_parcial):
+            os.remove(tim_parcial)
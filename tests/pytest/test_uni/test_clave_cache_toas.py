@@ -0,0 +1,82 @@
+import os
+import yaml
+import shutil
+from datetime import datetime
+from astropy.config import set_temp_cache
+from astropy.utils.data import import_file_to_cache
+from pint.observatory import global_clock_corrections
+from main.backend import _clave_cache_toas
+
+def test_clave_cache_toas():
+    config_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "config.yaml"))
+    with open(config_path, "r") as f:
+        config = yaml.safe_load(f)
+
+    logs_dir = os.path.abspath(os.path.join(config["paths"]["logs_dir"], "clave_cache_toas"))
+    os.makedirs(logs_dir, exist_ok=True)
+
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    log_path = os.path.join(logs_dir, f"log_clave_cache_toas_{timestamp}.txt")
+    trabajo = os.path.join(logs_dir, f"trabajo_{timestamp}")
+    relojes = os.path.join(trabajo, "relojes")
+    os.makedirs(relojes, exist_ok=True)
+    log_lines = []
+
+    override_previo = os.environ.get("PINT_CLOCK_OVERRIDE")
+    cache_astropy = set_temp_cache(trabajo)
+    try:
+        # Índice vacío del repositorio global de relojes en una caché temporal de astropy: PINT
+        # resuelve los archivos sin red y solo con el override o sus propios archivos
+        cache_astropy.__enter__()
+        indice = os.path.join(trabajo, "index.txt")
+        with open(indice, "w") as f:
+            f.write("# índice vacío\n")
+        import_file_to_cache(global_clock_corrections.global_clock_correction_url_base
+                             + global_clock_corrections.index_name, indice)
+
+        tim_path = os.path.join(trabajo, "gbt.tim")
+        with open(tim_path, "w") as f:
+            f.write("FORMAT 1\n")
+            f.write(" a 1400.0 55000.000000000000001 1.0 gbt\n")
+            f.write(" b 1400.0 55001.000000000000001 1.0 gbt\n")
+
+        reloj = os.path.join(relojes, "time_gbt.dat")
+        with open(reloj, "w") as f:
+            f.write("50000.00 0.000 0.000 0\n")
+
+        os.environ["PINT_CLOCK_OVERRIDE"] = relojes
+        clave_1 = _clave_cache_toas(tim_path, None, True)
+        assert _clave_cache_toas(tim_path, None, True) == clave_1, "La clave no es determinista."
+
+        # Un archivo de reloj ajeno al observatorio no invalida la entrada
+        with open(os.path.join(relojes, "time_ao.dat"), "w") as f:
+            f.write("50000.00 0.000 0.000 0\n")
+        assert _clave_cache_toas(tim_path, None, True) == clave_1, "Un reloj no usado cambió la clave."
+
+        # Actualizar el reloj del observatorio usado sí la invalida
+        with open(reloj, "a") as f:
+            f.write("60000.00 0.100 0.000 0\n")
+        clave_2 = _clave_cache_toas(tim_path, None, True)
+        assert clave_2 != clave_1, "La actualización del archivo de reloj no cambió la clave."
+
+        # Sin el override, PINT usaría otro archivo: la clave también cambia
+        del os.environ["PINT_CLOCK_OVERRIDE"]
+        assert _clave_cache_toas(tim_path, None, True) != clave_2, "La clave no depende del archivo de reloj resuelto."
+
+        log_lines.append("La función _clave_cache_toas pasó la prueba unitaria.")
+
+    except AssertionError as e:
+        log_lines.append(str(e))
+        raise
+
+    finally:
+        cache_astropy.__exit__(None, None, None)
+        if override_previo is None:
+            os.environ.pop("PINT_CLOCK_OVERRIDE", None)
+        else:
+            os.environ["PINT_CLOCK_OVERRIDE"] = override_previo
+
+        with open(log_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(log_lines))
+
+        shutil.rmtree(trabajo, ignore_errors=True)
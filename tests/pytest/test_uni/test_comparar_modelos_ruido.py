@@ -0,0 +1,57 @@
+import os
+import yaml
+import numpy as np
+from datetime import datetime
+from main.backend import comparar_modelos_ruido, seleccionar_kernel_gp
+
+def test_comparar_modelos_ruido():
+    config_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "config.yaml"))
+    with open(config_path, "r") as f:
+        config = yaml.safe_load(f)
+
+    logs_dir = os.path.abspath(os.path.join(config["paths"]["logs_dir"], "comparar_modelos_ruido"))
+    os.makedirs(logs_dir, exist_ok=True)
+
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    log_path = os.path.join(logs_dir, f"log_comparar_modelos_ruido_{timestamp}.txt")
+    log_lines = []
+
+    try:
+        rng = np.random.default_rng(23)
+        toas = np.sort(rng.uniform(0, 1, 60))
+        con_ruido_rojo = np.sin(6 * toas) + 0.1 * rng.normal(size=toas.size)
+
+        # Con ruido de timing, la hipótesis de solo spin-down queda muy por debajo
+        tabla = comparar_modelos_ruido(toas, con_ruido_rojo, hipotesis=["blanco", "matern32", "rbf"],
+                                       npoints=50, n_procesos=2)
+        for fila in tabla:
+            log_lines.append(f"{fila['hipotesis']}: log Z = {fila['log_evidencia']:.2f} ± {fila['error_log_evidencia']:.2f}")
+        assert [fila["hipotesis"] for fila in tabla][-1] == "blanco", "El ruido blanco no debería ganar."
+        assert tabla[0]["log_bayes"] == 0 and tabla[-1]["log_bayes"] < -20, "Factor de Bayes incorrecto."
+        assert all(np.isfinite(fila["log_evidencia"]) and fila["error_log_evidencia"] > 0 for fila in tabla), \
+            "Evidencias no finitas."
+        assert tabla[-1]["kernel"] is None and tabla[-1]["n_parametros"] == 1, "Fila de la hipótesis blanca incorrecta."
+
+        # La tabla sirve para entrenar el kernel ganador
+        modelo, tabla_kernels = seleccionar_kernel_gp(toas, con_ruido_rojo, kernels=["matern32", "rbf"],
+                                                      criterio="evidencia", n_procesos=1)
+        assert tabla_kernels[0]["kernel"] in ("matern32", "rbf"), "Kernel ganador inválido."
+        media, _ = modelo.predict(toas.reshape(-1, 1))
+        assert np.std(media.ravel() - np.sin(6 * toas)) < 0.1, "El GP entrenado no reproduce la señal."
+
+        # Con ruido blanco puro ninguna hipótesis con ruido rojo es claramente preferida
+        blanco = 0.3 * rng.normal(size=toas.size)
+        tabla = comparar_modelos_ruido(toas, blanco, hipotesis=["blanco", "matern32"], npoints=50, n_procesos=1)
+        fila_blanco = next(fila for fila in tabla if fila["hipotesis"] == "blanco")
+        log_lines.append(f"Ruido blanco: log B = {fila_blanco['log_bayes']:.2f}")
+        assert fila_blanco["log_bayes"] > -2, "Se prefiere ruido rojo en datos blancos."
+
+        log_lines.append("La función comparar_modelos_ruido pasó la prueba unitaria.")
+
+    except AssertionError as e:
+        log_lines.append(str(e))
+        raise
+
+    finally:
+        with open(log_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(log_lines))
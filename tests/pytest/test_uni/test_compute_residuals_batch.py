@@ -0,0 +1,48 @@
+import os
+import yaml
+import numpy as np
+import astropy.units as u
+from datetime import datetime
+from main.backend import load_toas, compute_residuals, compute_residuals_batch
+
+def test_compute_residuals_batch():
+    config_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "config.yaml"))
+    with open(config_path, "r") as f:
+        config = yaml.safe_load(f)
+
+    files_dir = os.path.abspath(config["paths"]["files_dir"])
+    logs_dir = os.path.abspath(os.path.join(config["paths"]["logs_dir"], "compute_residuals_batch"))
+    os.makedirs(logs_dir, exist_ok=True)
+
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    log_path = os.path.join(logs_dir, f"log_compute_residuals_batch_{timestamp}.txt")
+    log_lines = []
+
+    tim_path = os.path.join(files_dir, "psr04.tim")
+    par_path = os.path.join(files_dir, "psr04.par")
+
+    try:
+        toas = load_toas(tim_path, return_also_mjds=False)
+        residuals, model = compute_residuals(par_path, toas)
+
+        variantes = [par_path, {"F2": 0.0}, {"F2": 2 * model.F2.value}]
+        lote = compute_residuals_batch(variantes, toas, parFile=par_path, n_procesos=2)
+
+        assert lote.shape == (3, toas.ntoas), "La forma del arreglo de residuos no es la esperada."
+        assert np.allclose(lote[0], residuals.time_resids.to(u.s).value), \
+            "Los residuos del lote no coinciden con compute_residuals."
+        assert not np.allclose(lote[1], lote[2]), "Las variantes dieron residuos idénticos."
+
+        serie = compute_residuals_batch(variantes, toas, parFile=par_path, n_procesos=1)
+        assert np.allclose(lote, serie), "El cálculo en paralelo no coincide con el cálculo en serie."
+
+        log_lines.append(f"Se calcularon {lote.shape[0]} variantes de {lote.shape[1]} TOAs.")
+        log_lines.append("La función compute_residuals_batch pasó la prueba unitaria.")
+
+    except AssertionError as e:
+        log_lines.append(str(e))
+        raise
+
+    finally:
+        with open(log_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(log_lines))
@@ -0,0 +1,63 @@
+import os
+import yaml
+import numpy as np
+from datetime import datetime
+from main.backend import definir_ventanas
+
+def test_definir_ventanas():
+    config_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "config.yaml"))
+    with open(config_path, "r") as f:
+        config = yaml.safe_load(f)
+
+    logs_dir = os.path.abspath(os.path.join(config["paths"]["logs_dir"], "definir_ventanas"))
+    os.makedirs(logs_dir, exist_ok=True)
+
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    log_path = os.path.join(logs_dir, f"log_definir_ventanas_{timestamp}.txt")
+    log_lines = []
+
+    try:
+        # Dos campañas separadas por un hueco de 200 días
+        mjds = np.concatenate([np.linspace(55000, 55100, 50), np.linspace(55300, 55400, 50)])
+        ventanas = definir_ventanas(mjds, 40.0, min_toas=5)
+        log_lines.append(f"Ventanas: {ventanas}")
+
+        inicios = np.array([a for a, _ in ventanas])
+        assert all(np.isclose(b - a, 40.0) for a, b in ventanas), "El ancho de las ventanas es incorrecto."
+        assert np.allclose(np.diff(inicios)[np.diff(inicios) < 100], 20.0), "El paso por defecto debe ser ancho/2."
+        assert inicios[0] == mjds.min() and ventanas[-1][1] >= mjds.max(), "Las ventanas no cubren los datos."
+        assert not any(55120 < a and b < 55300 for a, b in ventanas), "Se conservó una ventana dentro del hueco."
+        for a, b in ventanas:
+            assert np.count_nonzero((mjds >= a) & (mjds <= b)) >= 5, "Ventana con menos TOAs que min_toas."
+
+        # Paso explícito y ventana más ancha que los datos
+        assert len(definir_ventanas(mjds, 40.0, paso=10.0, min_toas=5)) > len(ventanas), "El paso no se respetó."
+        assert definir_ventanas(mjds, 1000.0) == [(55000.0, 56000.0)], "Una ventana ancha debe cubrir todo."
+
+        # Si la grilla de inicios no llega al final, la última ventana se ancla en el último TOA
+        continuos = np.linspace(55000, 55105, 106)
+        finales = definir_ventanas(continuos, 40.0, paso=20.0, min_toas=5)
+        assert finales[-1] == (55065.0, 55105.0), "Los últimos TOAs quedaron sin ventana."
+        cubiertos = np.zeros(continuos.size, dtype=bool)
+        for a, b in finales:
+            cubiertos |= (continuos >= a) & (continuos <= b)
+        assert cubiertos.all(), "Quedaron TOAs sin cubrir."
+
+        # Sin TOAs no hay ventanas
+        assert definir_ventanas([], 40.0) == [], "Sin TOAs se esperaba una lista vacía."
+
+        try:
+            definir_ventanas(mjds, -1.0)
+            raise AssertionError("Un ancho negativo debería lanzar ValueError.")
+        except ValueError:
+            pass
+
+        log_lines.append("La función definir_ventanas pasó la prueba unitaria.")
+
+    except AssertionError as e:
+        log_lines.append(str(e))
+        raise
+
+    finally:
+        with open(log_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(log_lines))
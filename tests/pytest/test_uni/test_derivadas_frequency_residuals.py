@@ -0,0 +1,47 @@
+import os
+import yaml
+import numpy as np
+from datetime import datetime
+from scipy.interpolate import make_interp_spline
+from main.backend import frequency_residuals_func
+
+def test_derivadas_frequency_residuals():
+    config_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "config.yaml"))
+    with open(config_path, "r") as f:
+        config = yaml.safe_load(f)
+
+    logs_dir = os.path.abspath(os.path.join(config["paths"]["logs_dir"], "derivadas_frequency_residuals"))
+    os.makedirs(logs_dir, exist_ok=True)
+
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    log_path = os.path.join(logs_dir, f"log_derivadas_frequency_residuals_{timestamp}.txt")
+    log_lines = []
+
+    try:
+        rng = np.random.default_rng(0)
+        toas = np.sort(rng.uniform(50000, 55000, 2000))
+        phase_resids = np.sin((toas - 50000) / 500)
+
+        # Spline: las derivadas en una pasada deben coincidir con las del interpolante
+        t, f, df, d2f = frequency_residuals_func(toas, phase_resids, n_points=300)
+        interp = make_interp_spline(toas, phase_resids, k=2)
+        assert np.allclose(f, interp(t, 1)), "La 1ª derivada del spline no coincide."
+        assert np.allclose(df, interp(t, 2)), "La 2ª derivada del spline no coincide."
+        assert np.allclose(d2f, interp(t, 3)), "La 3ª derivada del spline no coincide."
+
+        # Chebyshev: estable con miles de TOAs (Lagrange divergía)
+        t, f, df, d2f = frequency_residuals_func(toas, phase_resids, n_points=300, method="chebyshev")
+        x = (t - 50000) / 500
+        assert np.allclose(f, np.cos(x) / 500, atol=1e-8), "La 1ª derivada de Chebyshev es incorrecta."
+        assert np.allclose(df, -np.sin(x) / 500 ** 2, atol=1e-9), "La 2ª derivada de Chebyshev es incorrecta."
+        assert np.allclose(d2f, -np.cos(x) / 500 ** 3, atol=1e-10), "La 3ª derivada de Chebyshev es incorrecta."
+
+        log_lines.append("Las derivadas de frequency_residuals_func pasaron la prueba unitaria.")
+
+    except AssertionError as e:
+        log_lines.append(str(e))
+        raise
+
+    finally:
+        with open(log_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(log_lines))
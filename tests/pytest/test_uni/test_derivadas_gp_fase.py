@@ -0,0 +1,88 @@
+import os
+import math
+import yaml
+import numpy as np
+from datetime import datetime
+from main.backend import derivadas_gp_fase, covarianza_derivadas_gp, normalizar_tiempos, obtener_frecuencia_total_y_errores
+
+def test_derivadas_gp_fase():
+    config_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "config.yaml"))
+    with open(config_path, "r") as f:
+        config = yaml.safe_load(f)
+
+    logs_dir = os.path.abspath(os.path.join(config["paths"]["logs_dir"], "derivadas_gp_fase"))
+    os.makedirs(logs_dir, exist_ok=True)
+
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    log_path = os.path.join(logs_dir, f"log_derivadas_gp_fase_{timestamp}.txt")
+    log_lines = []
+
+    try:
+        # Fase (ciclos) suave sobre 1000 días: φ(t) = A sin(ω t)
+        rng = np.random.default_rng(18)
+        mjds = np.sort(rng.uniform(55000, 56000, 150))
+        A, omega = 0.5, 2 * np.pi / (400 * 86400.0)
+        t_seg = (mjds - mjds.min()) * 86400.0
+        fase = A * np.sin(omega * t_seg) + 1e-4 * rng.normal(size=mjds.size)
+
+        norm_toas, _, t_scale = normalizar_tiempos(mjds)
+        modelo, derivadas = derivadas_gp_fase(norm_toas, fase, t_scale)
+        assert len(derivadas) == 3, "Se esperaban tres derivadas."
+
+        interior = slice(20, -20)
+        esperadas = [A * omega * np.cos(omega * t_seg),
+                     -A * omega ** 2 * np.sin(omega * t_seg),
+                     -A * omega ** 3 * np.cos(omega * t_seg)]
+
+        for orden, (derivada, esperada) in enumerate(zip(derivadas, esperadas), start=1):
+            media, varianza = derivada.predict(norm_toas)
+            assert media.shape == (mjds.size, 1) and varianza.shape == (mjds.size, 1), "Forma de predicción incorrecta."
+            assert np.all(varianza >= 0), "Varianza negativa."
+            error = np.max(np.abs(media.ravel()[interior] - esperada[interior])) / np.max(np.abs(esperada))
+            log_lines.append(f"Orden {orden}: error relativo máximo {error:.2e}")
+            assert error < 0.05, f"La derivada de orden {orden} no reproduce la analítica."
+
+        # La primera derivada coincide con la diferencia finita de la media del GP
+        h = 1e-4
+        mas, _ = modelo.predict(norm_toas + h)
+        menos, _ = modelo.predict(norm_toas - h)
+        diferencia = (mas - menos) / (2 * h) / (t_scale * 86400.0)
+        media, _ = derivadas[0].predict(norm_toas)
+        assert np.allclose(media, diferencia, rtol=1e-4, atol=1e-6 * np.max(np.abs(diferencia))), "La derivada no coincide con la diferencia finita."
+
+        # Sirve directamente para obtener_frecuencia_total_y_errores
+        f_total, arriba, abajo = obtener_frecuencia_total_y_errores(norm_toas, derivadas[0], f_base=10.0)
+        assert np.all(arriba >= f_total) and np.all(abajo <= f_total), "Banda de error inválida."
+
+        # Covarianza conjunta de f, ḟ y f̈: su diagonal es la varianza de cada derivada y coincide
+        # con diferencias finitas de la covarianza posterior completa de la fase
+        media_c, covarianza = covarianza_derivadas_gp(derivadas, norm_toas)
+        for k, derivada in enumerate(derivadas):
+            media, varianza = derivada.predict(norm_toas)
+            assert np.allclose(media_c[:, k], media.ravel()) and np.allclose(covarianza[:, k, k], varianza.ravel()), \
+                "La diagonal de la covarianza conjunta no coincide con las derivadas."
+        h = 0.02 * float(modelo.kern.lengthscale)
+        nodos = np.arange(-3, 4)
+        pesos = np.array([np.linalg.solve(np.vander(nodos * h, 7, increasing=True).T, np.eye(7)[p] * math.factorial(p))
+                          * (t_scale * 86400.0) ** -p for p in (1, 2, 3)])
+        for i in (mjds.size // 3, mjds.size // 2):
+            _, completa = modelo.predict_noiseless((norm_toas[i] + h * nodos)[:, None], full_cov=True)
+            assert np.allclose(pesos @ completa @ pesos.T, covarianza[i], rtol=0.02), \
+                "La covarianza conjunta no coincide con las diferencias finitas."
+
+        # Un kernel distinto de RBF se rechaza en lugar de reemplazarse en silencio
+        try:
+            derivadas_gp_fase(norm_toas, fase, t_scale, kernel="matern32")
+            raise AssertionError("Un kernel distinto de 'rbf' debería lanzar ValueError.")
+        except ValueError:
+            pass
+
+        log_lines.append("La función derivadas_gp_fase pasó la prueba unitaria.")
+
+    except AssertionError as e:
+        log_lines.append(str(e))
+        raise
+
+    finally:
+        with open(log_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(log_lines))
@@ -0,0 +1,44 @@
+import os
+import yaml
+import numpy as np
+from datetime import datetime
+from main.backend import entrenamiento_gp_model, entrenamiento_gp_paralelo
+
+def test_entrenamiento_gp_paralelo():
+    config_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "config.yaml"))
+    with open(config_path, "r") as f:
+        config = yaml.safe_load(f)
+
+    logs_dir = os.path.abspath(os.path.join(config["paths"]["logs_dir"], "entrenamiento_gp_paralelo"))
+    os.makedirs(logs_dir, exist_ok=True)
+
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    log_path = os.path.join(logs_dir, f"log_entrenamiento_gp_paralelo_{timestamp}.txt")
+    log_lines = []
+
+    try:
+        rng = np.random.default_rng(3)
+        toas = np.linspace(0, 1, 150)
+        series = [np.sin(6 * toas) + 0.1 * rng.normal(size=toas.size),
+                  1e-3 * np.cos(3 * toas) + 1e-5 * rng.normal(size=toas.size),
+                  toas ** 2 + 0.05 * rng.normal(size=toas.size)]
+
+        modelos = entrenamiento_gp_paralelo(toas, series)
+        assert len(modelos) == 3, "No se retornaron los tres modelos."
+
+        for modelo, serie in zip(modelos, series):
+            referencia = entrenamiento_gp_model(toas, serie)
+            assert np.isclose(modelo.log_likelihood(), referencia.log_likelihood(), rtol=1e-6), \
+                "El modelo entrenado en paralelo no coincide con el entrenamiento en serie."
+            media, _ = modelo.predict(toas.reshape(-1, 1))
+            assert media.shape == (toas.size, 1), "La predicción del modelo reconstruido tiene forma incorrecta."
+
+        log_lines.append("La función entrenamiento_gp_paralelo pasó la prueba unitaria.")
+
+    except AssertionError as e:
+        log_lines.append(str(e))
+        raise
+
+    finally:
+        with open(log_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(log_lines))
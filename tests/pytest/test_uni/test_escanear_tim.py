@@ -0,0 +1,74 @@
+import os
+import yaml
+from datetime import datetime
+from main.backend import escanear_tim
+
+def test_escanear_tim():
+    config_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "config.yaml"))
+    with open(config_path, "r") as f:
+        config = yaml.safe_load(f)
+
+    files_dir = os.path.abspath(config["paths"]["files_dir"])
+    logs_dir = os.path.abspath(os.path.join(config["paths"]["logs_dir"], "escanear_tim"))
+    os.makedirs(logs_dir, exist_ok=True)
+
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    log_path = os.path.join(logs_dir, f"log_escanear_tim_{timestamp}.txt")
+    include_path = os.path.join(logs_dir, f"include_{timestamp}.tim")
+    log_lines = []
+
+    tim_path = os.path.join(files_dir, "B1855+09_NANOGrav_dfg+12.tim")
+
+    try:
+        assert os.path.exists(tim_path), f"Archivo .tim no encontrado: {tim_path}"
+
+        resumen = escanear_tim(tim_path)
+        assert resumen["ntoas"] == 702, "Número de TOAs incorrecto."
+        assert abs(resumen["mjd_min"] - 53358.7274648894) < 1e-6, "MJD mínimo incorrecto."
+        assert abs(resumen["mjd_max"] - 55108.9219174172) < 1e-6, "MJD máximo incorrecto."
+        assert resumen["sites"] == {"arecibo": 702}, "Resumen de observatorios incorrecto."
+        assert "fe" in resumen["flags"], "No se leyeron los flags."
+        log_lines.append(f"Se escanearon {resumen['ntoas']} TOAs.")
+
+        # INCLUDE, comentarios y SKIP
+        with open(include_path, "w") as f:
+            f.write("FORMAT 1\n")
+            f.write("C comentario\n")
+            f.write(f"INCLUDE {tim_path}\n")
+            f.write("SKIP\n")
+            f.write(" x 1400.0 60000.0 1.0 ao -fe L-wide\n")
+            f.write("NOSKIP\n")
+            f.write(" x 1400.0 56000.0 1.0 ao -fe L-wide\n")
+
+        resumen = escanear_tim(include_path)
+        assert resumen["ntoas"] == 703, "INCLUDE o SKIP no se procesaron correctamente."
+        assert resumen["mjd_max"] == 56000.0, "El TOA dentro de SKIP no fue ignorado."
+        assert resumen["flags"]["fe"]["L-wide"] == 1, "Conteo de flags incorrecto."
+
+        # Sin FORMAT 1 el formato de cada línea se detecta como en PINT (Princeton y Parkes)
+        princeton = "3" + " " * 14 + f"{1400.0:9.3f}" + f"{'54321.1234567890123':>20s}" + f"{1.5:9.2f}"
+        parkes = (" " + f"{'J0000+0000':<24s}" + f"{1400.0:9.3f}" + "  54322.5000000000000" + f"{0.0:7.4f}"
+                  + " " + f"{2.0:8.3f}" + " " * 8 + "7")
+        with open(include_path, "w") as f:
+            f.write("C comentario\n")
+            f.write(princeton + "\n")
+            f.write(parkes + "\n")
+
+        resumen = escanear_tim(include_path)
+        assert resumen["ntoas"] == 2, "No se detectaron los formatos Princeton y Parkes."
+        assert abs(resumen["mjd_min"] - 54321.1234567890123) < 1e-8, "MJD Princeton incorrecto."
+        assert resumen["mjd_max"] == 54322.5, "MJD Parkes incorrecto."
+        assert resumen["sites"] == {"arecibo": 1, "parkes": 1}, "Observatorios de columnas fijas incorrectos."
+
+        log_lines.append("La función escanear_tim pasó la prueba unitaria.")
+
+    except AssertionError as e:
+        log_lines.append(str(e))
+        raise
+
+    finally:
+        with open(log_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(log_lines))
+
+        if os.path.exists(include_path):
+            os.remove(include_path)
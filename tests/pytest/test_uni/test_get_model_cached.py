@@ -0,0 +1,50 @@
+import os
+import yaml
+import shutil
+from datetime import datetime
+from main.backend import get_model_cached
+
+def test_get_model_cached():
+    config_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "config.yaml"))
+    with open(config_path, "r") as f:
+        config = yaml.safe_load(f)
+
+    files_dir = os.path.abspath(config["paths"]["files_dir"])
+    logs_dir = os.path.abspath(os.path.join(config["paths"]["logs_dir"], "get_model_cached"))
+    os.makedirs(logs_dir, exist_ok=True)
+
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    log_path = os.path.join(logs_dir, f"log_get_model_cached_{timestamp}.txt")
+    cache_dir = os.path.join(logs_dir, f"cache_{timestamp}")
+    log_lines = []
+
+    par_path = os.path.join(files_dir, "B1855+09_NANOGrav_dfg+12_modified_DD.par")
+
+    try:
+        assert os.path.exists(par_path), f"Archivo .par no encontrado: {par_path}"
+
+        model_1 = get_model_cached(par_path, usar_disco=True, cache_dir=cache_dir)
+        model_2 = get_model_cached(par_path, usar_disco=True, cache_dir=cache_dir)
+        assert model_1 is not model_2, "Se entregó el mismo objeto en lugar de una copia."
+        assert model_1.F0.value == model_2.F0.value, "Las copias del modelo no coinciden."
+        assert len(os.listdir(cache_dir)) == 1, "No se guardó el modelo serializado en disco."
+
+        # Modificar una copia no debe alterar la caché
+        model_1.F0.value = model_1.F0.value + 1.0
+        model_3 = get_model_cached(par_path)
+        assert model_3.F0.value == model_2.F0.value, "La copia modificada alteró la caché."
+
+        assert get_model_cached(par_path, copiar=False) is get_model_cached(par_path, copiar=False), \
+            "Sin copia se debe entregar el modelo compartido."
+
+        log_lines.append("La función get_model_cached pasó la prueba unitaria.")
+
+    except AssertionError as e:
+        log_lines.append(str(e))
+        raise
+
+    finally:
+        with open(log_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(log_lines))
+
+        shutil.rmtree(cache_dir, ignore_errors=True)
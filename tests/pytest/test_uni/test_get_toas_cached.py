@@ -0,0 +1,50 @@
+import os
+import yaml
+import shutil
+from datetime import datetime
+from main.backend import get_toas_cached
+
+def test_get_toas_cached():
+    config_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "config.yaml"))
+    with open(config_path, "r") as f:
+        config = yaml.safe_load(f)
+
+    files_dir = os.path.abspath(config["paths"]["files_dir"])
+    logs_dir = os.path.abspath(os.path.join(config["paths"]["logs_dir"], "get_toas_cached"))
+    os.makedirs(logs_dir, exist_ok=True)
+
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    log_path = os.path.join(logs_dir, f"log_get_toas_cached_{timestamp}.txt")
+    cache_dir = os.path.join(logs_dir, f"cache_{timestamp}")
+    log_lines = []
+
+    tim_path = os.path.join(files_dir, "psr04.tim")
+
+    try:
+        assert os.path.exists(tim_path), f"Archivo .tim no encontrado: {tim_path}"
+
+        toas_1 = get_toas_cached(tim_path, cache_dir=cache_dir)
+        entradas = [n for n in os.listdir(cache_dir) if n.endswith(".pickle.gz")]
+        assert len(entradas) == 1, "No se creó la entrada de caché."
+
+        toas_2 = get_toas_cached(tim_path, cache_dir=cache_dir)
+        assert toas_2.ntoas == toas_1.ntoas, "Los TOAs leídos de la caché no coinciden."
+        assert (toas_2.get_mjds() == toas_1.get_mjds()).all(), "Los MJDs de la caché no coinciden."
+        log_lines.append("La segunda carga se leyó desde la caché.")
+
+        # Con límite 0 la entrada debe ser desalojada
+        get_toas_cached(tim_path, ephem="DE421", cache_dir=cache_dir, max_bytes=0)
+        entradas = [n for n in os.listdir(cache_dir) if n.endswith(".pickle.gz")]
+        assert len(entradas) == 0, "La caché no respetó el tamaño máximo."
+
+        log_lines.append("La función get_toas_cached pasó la prueba unitaria.")
+
+    except AssertionError as e:
+        log_lines.append(str(e))
+        raise
+
+    finally:
+        with open(log_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(log_lines))
+
+        shutil.rmtree(cache_dir, ignore_errors=True)
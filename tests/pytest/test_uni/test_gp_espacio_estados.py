@@ -0,0 +1,82 @@
+import os
+import yaml
+import GPy
+import numpy as np
+from datetime import datetime
+from main.backend import GPEspacioEstados, entrenamiento_gp_model, entrenamiento_gp_paralelo
+
+def test_gp_espacio_estados():
+    config_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "config.yaml"))
+    with open(config_path, "r") as f:
+        config = yaml.safe_load(f)
+
+    logs_dir = os.path.abspath(os.path.join(config["paths"]["logs_dir"], "gp_espacio_estados"))
+    os.makedirs(logs_dir, exist_ok=True)
+
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    log_path = os.path.join(logs_dir, f"log_gp_espacio_estados_{timestamp}.txt")
+    log_lines = []
+
+    try:
+        rng = np.random.default_rng(5)
+        toas = np.sort(rng.uniform(0, 1, 300))
+        residuos = np.sin(8 * toas) + 0.1 * rng.normal(size=toas.size)
+        consulta = np.linspace(0, 1, 40)
+
+        # Matern: el filtro de Kalman es exacto, debe coincidir con GPy
+        for nombre, kern in (("matern32", GPy.kern.Matern32), ("matern52", GPy.kern.Matern52)):
+            ss = GPEspacioEstados(toas, residuos, kernel=nombre, variance=0.7, lengthscale=0.2, noise_variance=0.02)
+            gp = GPy.models.GPRegression(toas.reshape(-1, 1), residuos.reshape(-1, 1),
+                                         kern(input_dim=1, variance=0.7, lengthscale=0.2))
+            gp.Gaussian_noise.variance = 0.02
+
+            media, varianza = ss.predict(consulta)
+            media_gpy, varianza_gpy = gp.predict(consulta.reshape(-1, 1))
+            assert np.allclose(ss.log_likelihood(), gp.log_likelihood(), atol=1e-3), f"Log-verosimilitud {nombre} incorrecta."
+            assert np.allclose(media, media_gpy, atol=1e-6), f"Media posterior {nombre} incorrecta."
+            assert np.allclose(varianza, varianza_gpy, atol=1e-6), f"Varianza posterior {nombre} incorrecta."
+
+            # Gradiente por paso complejo vs diferencias finitas
+            theta = ss._theta.copy()
+            _, gradiente = ss._loglik(theta)
+            for j in range(3):
+                e = np.zeros(3)
+                e[j] = 1e-5
+                numerico = (ss._loglik(theta + e, False) - ss._loglik(theta - e, False)) / 2e-5
+                assert np.isclose(gradiente[j], numerico, rtol=1e-4, atol=1e-4), f"Gradiente {nombre}[{j}] incorrecto."
+
+            # El suavizado por bloques no debe depender del tamaño de bloque
+            media_bloques, varianza_bloques = ss.predict(consulta, tamano_bloque=7)
+            assert np.allclose(media_bloques, media, atol=1e-10), f"La media {nombre} depende del bloque."
+            assert np.allclose(varianza_bloques, varianza, atol=1e-10), f"La varianza {nombre} depende del bloque."
+
+        # RBF muestreado densamente respecto a ℓ: el escaneo debe seguir dando el gradiente correcto
+        densos = np.sort(rng.uniform(0, 1, 2000))
+        ss = GPEspacioEstados(densos, np.sin(8 * densos) + 0.1 * rng.normal(size=densos.size), kernel="rbf",
+                              variance=0.1, lengthscale=0.1, noise_variance=0.01)
+        theta = ss._theta.copy()
+        _, gradiente = ss._loglik(theta)
+        for j in range(3):
+            e = np.zeros(3)
+            e[j] = 1e-5
+            numerico = (ss._loglik(theta + e, False) - ss._loglik(theta - e, False)) / 2e-5
+            assert np.isclose(gradiente[j], numerico, rtol=1e-4, atol=1e-3), f"Gradiente rbf denso[{j}] incorrecto."
+
+        # Optimización a escala de residuos de frecuencia (1e-15 Hz) a través de entrenamiento_gp_model
+        modelo = entrenamiento_gp_model(toas, residuos * 1e-15, motor="estado", kernel_estado="matern52")
+        assert np.isclose(np.sqrt(modelo.noise_variance), 1e-16, rtol=0.3), "No se recuperó el nivel de ruido."
+
+        modelos = entrenamiento_gp_paralelo(toas, [residuos, 2 * residuos], motor="estado", kernel_estado="rbf")
+        assert all(isinstance(m, GPEspacioEstados) for m in modelos), "El entrenamiento paralelo no usó el motor estado."
+        assert np.allclose(modelos[1].predict(consulta)[0], 2 * modelos[0].predict(consulta)[0], atol=0.05), \
+            "El motor estado no escala correctamente con los datos."
+
+        log_lines.append("El GP en espacio de estados pasó la prueba unitaria.")
+
+    except AssertionError as e:
+        log_lines.append(str(e))
+        raise
+
+    finally:
+        with open(log_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(log_lines))
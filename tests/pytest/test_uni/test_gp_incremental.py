@@ -0,0 +1,61 @@
+import os
+import yaml
+import numpy as np
+from datetime import datetime
+from main.backend import entrenamiento_gp_model, actualizar_gp_incremental, _construir_gp_model
+
+def test_gp_incremental():
+    config_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "config.yaml"))
+    with open(config_path, "r") as f:
+        config = yaml.safe_load(f)
+
+    logs_dir = os.path.abspath(os.path.join(config["paths"]["logs_dir"], "gp_incremental"))
+    os.makedirs(logs_dir, exist_ok=True)
+
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    log_path = os.path.join(logs_dir, f"log_gp_incremental_{timestamp}.txt")
+    log_lines = []
+
+    try:
+        rng = np.random.default_rng(20)
+        toas = np.sort(rng.uniform(0, 1, 400))
+        residuos = np.sin(8 * toas) + 0.05 * rng.normal(size=toas.size)
+        n_previos = 380
+
+        modelo = entrenamiento_gp_model(toas[:n_previos], residuos[:n_previos])
+        actualizado, info = actualizar_gp_incremental(modelo, toas, residuos)
+        assert info["nuevos"] == 20 and not info["reoptimizado"], "Se reoptimizó sin deriva."
+        assert modelo.X.shape[0] == n_previos, "Se modificó el modelo original."
+
+        # Con hiperparámetros fijos debe coincidir con el GP completo
+        completo = _construir_gp_model(toas, residuos)
+        completo[:] = modelo.param_array
+        x = np.linspace(0, 1.05, 60).reshape(-1, 1)
+        media_a, var_a = actualizado.predict(x)
+        media_c, var_c = completo.predict(x)
+        assert np.allclose(media_a, media_c, atol=1e-6) and np.allclose(var_a, var_c, atol=1e-6), "El posterior actualizado no coincide."
+        assert np.isclose(float(actualizado.log_likelihood()), float(completo.log_likelihood())), "La log-verosimilitud no coincide."
+        log_lines.append(f"Actualización de rango k: {info}")
+
+        # Datos nuevos inconsistentes activan la reoptimización
+        desplazados = residuos.copy()
+        desplazados[n_previos:] += 1.0
+        _, info = actualizar_gp_incremental(modelo, toas, desplazados)
+        assert info["reoptimizado"] and info["motivo"] == "deriva", "No se detectó la deriva."
+        log_lines.append(f"Con deriva: {info}")
+
+        # Motores sparse y de espacio de estados
+        for motor in ("sparse", "estado"):
+            previo = entrenamiento_gp_model(toas[:n_previos], residuos[:n_previos], motor=motor, n_inducidos=30)
+            nuevo, info = actualizar_gp_incremental(previo, toas, residuos)
+            assert nuevo.X.shape[0] == toas.size and not info["reoptimizado"], f"Falló la actualización del motor {motor}."
+
+        log_lines.append("La función actualizar_gp_incremental pasó la prueba unitaria.")
+
+    except AssertionError as e:
+        log_lines.append(str(e))
+        raise
+
+    finally:
+        with open(log_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(log_lines))
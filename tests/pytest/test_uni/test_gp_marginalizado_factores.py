@@ -0,0 +1,84 @@
+import os
+import yaml
+import numpy as np
+from datetime import datetime
+import main.backend as backend
+from main.backend import GPMarginalizado, entrenamiento_gp_model, predecir_gp_mjd
+
+def test_gp_marginalizado_factores():
+    config_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "config.yaml"))
+    with open(config_path, "r") as f:
+        config = yaml.safe_load(f)
+
+    logs_dir = os.path.abspath(os.path.join(config["paths"]["logs_dir"], "gp_marginalizado_factores"))
+    os.makedirs(logs_dir, exist_ok=True)
+
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    log_path = os.path.join(logs_dir, f"log_gp_marginalizado_factores_{timestamp}.txt")
+    log_lines = []
+
+    construir = backend._construir_gp_model
+    construcciones = []
+
+    def contar(*args, **kwargs):
+        construcciones.append(kwargs.get("motor", "denso"))
+        return construir(*args, **kwargs)
+
+    backend._construir_gp_model = contar
+    try:
+        rng = np.random.default_rng(31)
+        toas = np.sort(rng.uniform(0, 1, 200))
+        residuos = np.sin(6 * toas) + 0.1 * rng.normal(size=toas.size)
+        x = np.linspace(-0.1, 1.1, 500)
+
+        for motor in ("denso", "sparse"):
+            optimo = entrenamiento_gp_model(toas, residuos, motor=motor, n_inducidos=20)
+            n_muestras = 12
+            parametros = np.repeat(np.asarray(optimo.param_array)[None, :], n_muestras, axis=0)
+            parametros[:, -3:] *= np.exp(0.1 * rng.normal(size=(n_muestras, 3)))
+            pesos = np.full(n_muestras, 1 / n_muestras)
+            modelo = GPMarginalizado(toas, residuos, {"motor": motor, "n_inducidos": 20}, parametros, pesos)
+
+            # Predicciones repetidas, por bloques y de la derivada: cada muestra se factoriza una vez
+            del construcciones[:]
+            media, varianza = modelo.predict(x)
+            modelo.predict(x)
+            media_bloques, varianza_bloques = predecir_gp_mjd(modelo, x, 0.0, 1.0, tamano_bloque=64)
+            modelo.derivada(1).predict(x)
+            log_lines.append(f"Construcciones con motor {motor}: {len(construcciones)}")
+            assert len(construcciones) == n_muestras, f"Se reconstruyeron posteriores con motor {motor}."
+            assert np.allclose(media_bloques, media.ravel()) and np.allclose(varianza_bloques, varianza.ravel()), \
+                f"La predicción por bloques con motor {motor} no coincide."
+
+            # Los factores conservados predicen igual que los GPs completos
+            media_ref = np.zeros_like(media)
+            segundo_ref = np.zeros_like(media)
+            for p, w in zip(parametros, pesos):
+                gp = construir(toas, residuos, motor=motor, n_inducidos=20)
+                gp[:] = p
+                mu, var = gp.predict(x.reshape(-1, 1))
+                media_ref += w * mu
+                segundo_ref += w * (var + mu ** 2)
+            assert np.allclose(media, media_ref, atol=1e-8), f"Media marginalizada con motor {motor} incorrecta."
+            assert np.allclose(varianza, segundo_ref - media_ref ** 2, atol=1e-8), \
+                f"Varianza marginalizada con motor {motor} incorrecta."
+
+        log_lines.append("Los posteriores de GPMarginalizado se factorizan una sola vez.")
+
+        # Las derivadas solo existen para motores de GPy con kernel RBF: se rechazan al pedirlas
+        for opciones in ({"motor": "estado"}, {"kernel": "matern32"}):
+            modelo = GPMarginalizado(toas, residuos, opciones, parametros, pesos)
+            try:
+                modelo.derivada(1)
+                raise AssertionError(f"derivada() con {opciones} debería lanzar ValueError.")
+            except ValueError:
+                pass
+
+    except AssertionError as e:
+        log_lines.append(str(e))
+        raise
+
+    finally:
+        backend._construir_gp_model = construir
+        with open(log_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(log_lines))
@@ -0,0 +1,60 @@
+import os
+import yaml
+import numpy as np
+from datetime import datetime
+from main.backend import entrenamiento_gp_mcmc, entrenamiento_gp_model, obtener_frecuencia_total_y_errores
+
+def test_gp_mcmc():
+    config_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "config.yaml"))
+    with open(config_path, "r") as f:
+        config = yaml.safe_load(f)
+
+    logs_dir = os.path.abspath(os.path.join(config["paths"]["logs_dir"], "gp_mcmc"))
+    os.makedirs(logs_dir, exist_ok=True)
+
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    log_path = os.path.join(logs_dir, f"log_gp_mcmc_{timestamp}.txt")
+    log_lines = []
+
+    try:
+        rng = np.random.default_rng(22)
+        toas = np.sort(rng.uniform(0, 1, 60))
+        residuos = np.sin(6 * toas) + 0.1 * rng.normal(size=toas.size)
+
+        modelo = entrenamiento_gp_mcmc(toas, residuos, n_pasos=100, n_procesos=2, semilla=1)
+        info = modelo.info
+        log_lines.append(f"Aceptación: {info['fraccion_aceptacion']:.2f}, muestras: {info['n_muestras']}")
+        assert 0.05 < info["fraccion_aceptacion"] < 0.95, "Fracción de aceptación fuera de rango."
+        assert modelo.parametros.shape[0] == info["n_muestras"] and np.isclose(modelo.pesos.sum(), 1.0), "Pesos inválidos."
+
+        # Dentro de los datos la mezcla se parece al óptimo; fuera, su banda no es más estrecha
+        optimo = entrenamiento_gp_model(toas, residuos)
+        x = np.linspace(-0.2, 1.2, 50).reshape(-1, 1)
+        media, varianza = modelo.predict(x)
+        media_opt, varianza_opt = optimo.predict(x)
+        assert media.shape == (50, 1) and varianza.shape == (50, 1), "Forma de predicción incorrecta."
+        assert np.max(np.abs(media[10:40] - media_opt[10:40])) < 0.1, "La media marginalizada se aleja del óptimo."
+        assert varianza[0, 0] >= 0.9 * varianza_opt[0, 0] and varianza[-1, 0] >= 0.9 * varianza_opt[-1, 0], \
+            "La banda marginalizada es más estrecha que la del óptimo."
+
+        # Derivada de la mezcla (ν̇ a partir de ν) y uso en obtener_frecuencia_total_y_errores
+        derivada = modelo.derivada(1, 1.0)
+        media_d, _ = derivada.predict(x[10:40])
+        assert np.max(np.abs(media_d.ravel() - 6 * np.cos(6 * x[10:40].ravel()))) < 1.5, "Derivada incorrecta."
+        f_total, arriba, abajo = obtener_frecuencia_total_y_errores(toas.reshape(-1, 1), modelo, f_base=10.0)
+        assert np.all(arriba >= f_total) and np.all(abajo <= f_total), "Banda de error inválida."
+
+        # Con la misma semilla el resultado es reproducible en serie
+        a = entrenamiento_gp_mcmc(toas, residuos, n_pasos=30, n_procesos=1, semilla=3)
+        b = entrenamiento_gp_mcmc(toas, residuos, n_pasos=30, n_procesos=1, semilla=3)
+        assert np.allclose(a.parametros, b.parametros), "El muestreo no es reproducible."
+
+        log_lines.append("La función entrenamiento_gp_mcmc pasó la prueba unitaria.")
+
+    except AssertionError as e:
+        log_lines.append(str(e))
+        raise
+
+    finally:
+        with open(log_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(log_lines))
@@ -0,0 +1,72 @@
+import os
+import yaml
+import shutil
+import numpy as np
+from datetime import datetime
+from main.backend import entrenamiento_gp_persistente, entrenamiento_gp_paralelo
+
+def test_gp_persistente():
+    config_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "config.yaml"))
+    with open(config_path, "r") as f:
+        config = yaml.safe_load(f)
+
+    logs_dir = os.path.abspath(os.path.join(config["paths"]["logs_dir"], "gp_persistente"))
+    os.makedirs(logs_dir, exist_ok=True)
+
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    log_path = os.path.join(logs_dir, f"log_gp_persistente_{timestamp}.txt")
+    store_dir = os.path.join(logs_dir, f"store_{timestamp}")
+    log_lines = []
+
+    try:
+        rng = np.random.default_rng(15)
+        toas = np.sort(rng.uniform(0, 1, 200))
+        residuos = np.sin(6 * toas) + 0.05 * rng.normal(size=toas.size)
+
+        modelo_1 = entrenamiento_gp_persistente(toas, residuos, "J0000+0000", store_dir=store_dir)
+        carpeta = os.path.join(store_dir, "J0000+0000", "f_denso-rbf")
+        assert len(os.listdir(carpeta)) == 1, "No se guardó el modelo en el almacén."
+
+        # La segunda llamada debe cargar el modelo sin reentrenar
+        modelo_2 = entrenamiento_gp_persistente(toas, residuos, "J0000+0000", store_dir=store_dir)
+        assert np.allclose(modelo_1.param_array, modelo_2.param_array), "Los hiperparámetros no coinciden."
+        media_1, var_1 = modelo_1.predict(toas[:, None])
+        media_2, var_2 = modelo_2.predict(toas[:, None])
+        assert np.allclose(media_1, media_2) and np.allclose(var_1, var_2), "Las predicciones cargadas no coinciden."
+        log_lines.append("El modelo se recuperó del almacén con las mismas predicciones.")
+
+        # Con TOAs añadidos se parte (warm start) del modelo anterior y se guarda una nueva entrada
+        toas_ext = np.concatenate([toas, np.linspace(1.01, 1.1, 10)])
+        residuos_ext = np.sin(6 * toas_ext)
+        modelo_3 = entrenamiento_gp_persistente(toas_ext, residuos_ext, "J0000+0000", store_dir=store_dir)
+        assert np.isfinite(modelo_3.log_likelihood()), "El warm start produjo un modelo inválido."
+        assert len(os.listdir(carpeta)) == 2, "No se guardó el modelo con los TOAs añadidos."
+
+        # Con un tope de tamaño se podan los modelos menos usados recientemente: se vuelve a usar
+        # el primero y al guardar un tercero del mismo tamaño que el segundo, este es el que se borra
+        # (cada uso deja un mtime estrictamente mayor que el de las demás entradas, sin empates)
+        entrada_3 = max((os.path.join(carpeta, n) for n in os.listdir(carpeta)), key=lambda r: os.stat(r).st_mtime_ns)
+        entrenamiento_gp_persistente(toas, residuos, "J0000+0000", store_dir=store_dir)
+        entrenamiento_gp_persistente(toas_ext, np.cos(6 * toas_ext), "J0000+0000", store_dir=store_dir,
+                                     max_bytes=2 * os.path.getsize(entrada_3))
+        assert len(os.listdir(carpeta)) == 2 and not os.path.exists(entrada_3), "No se podó el modelo menos usado."
+        modelo_1b = entrenamiento_gp_persistente(toas, residuos, "J0000+0000", store_dir=store_dir)
+        assert np.allclose(modelo_1b.param_array, modelo_1.param_array), "Se podó el modelo usado recientemente."
+
+        # El entrenamiento paralelo reutiliza las entradas del almacén
+        modelos = entrenamiento_gp_paralelo(toas, [residuos, 2 * residuos], nombre_pulsar="J0000+0000",
+                                            etiquetas=["f", "df"], store_dir=store_dir)
+        assert np.allclose(modelos[0].param_array, modelo_1.param_array), "El modelo paralelo no usó el almacén."
+        assert os.listdir(os.path.join(store_dir, "J0000+0000", "df_denso-rbf")), "No se guardó la serie nueva del entrenamiento paralelo."
+
+        log_lines.append("La función entrenamiento_gp_persistente pasó la prueba unitaria.")
+
+    except AssertionError as e:
+        log_lines.append(str(e))
+        raise
+
+    finally:
+        with open(log_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(log_lines))
+
+        shutil.rmtree(store_dir, ignore_errors=True)
@@ -0,0 +1,76 @@
+import os
+import time
+import yaml
+import multiprocessing
+import numpy as np
+from datetime import datetime
+from main.backend import entrenamiento_gp_reinicios
+
+def test_gp_reinicios():
+    config_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "config.yaml"))
+    with open(config_path, "r") as f:
+        config = yaml.safe_load(f)
+
+    logs_dir = os.path.abspath(os.path.join(config["paths"]["logs_dir"], "gp_reinicios"))
+    os.makedirs(logs_dir, exist_ok=True)
+
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    log_path = os.path.join(logs_dir, f"log_gp_reinicios_{timestamp}.txt")
+    log_lines = []
+
+    try:
+        rng = np.random.default_rng(16)
+        toas = np.sort(rng.uniform(0, 1, 200))
+        residuos = np.sin(20 * toas) + 0.1 * rng.normal(size=toas.size)
+
+        modelo, telemetria = entrenamiento_gp_reinicios(toas, residuos, n_reinicios=4, n_procesos=2)
+        assert len(telemetria["reinicios"]) == 4, "Faltan reinicios en la telemetría."
+        assert all(r is not None for r in telemetria["reinicios"]), "Un reinicio no terminó sin límite de tiempo."
+        assert telemetria["errores"] == [None] * 4, "Se registraron errores en reinicios válidos."
+        for clave in ("iteraciones", "evaluaciones", "log_likelihood", "norma_gradiente", "motivo", "tiempo"):
+            assert clave in telemetria["reinicios"][0], f"Falta '{clave}' en la telemetría."
+
+        mejor = max(r["log_likelihood"] for r in telemetria["reinicios"])
+        assert np.isclose(float(modelo.log_likelihood()), mejor), "El modelo retornado no es el mejor reinicio."
+        log_lines.append(f"Mejor reinicio: {telemetria['mejor']} (log-verosimilitud {mejor:.4f}).")
+
+        # Con un presupuesto mínimo se retorna el mejor punto evaluado hasta entonces
+        modelo, telemetria = entrenamiento_gp_reinicios(toas, residuos, n_reinicios=4, n_procesos=1, tiempo_max=0.0)
+        assert telemetria["presupuesto_agotado"], "No se detectó el presupuesto agotado."
+        assert telemetria["mejor"] == 0, "Se esperaba el resultado parcial del primer reinicio."
+        assert np.isfinite(float(modelo.log_likelihood())), "El resultado parcial no es válido."
+
+        # En paralelo, los workers ocupados en una evaluación lenta al vencer el plazo se terminan:
+        # ningún proceso del pool sobrevive a la llamada
+        toas_grandes = np.sort(rng.uniform(0, 1, 3000))
+        residuos_grandes = np.sin(20 * toas_grandes) + 0.1 * rng.normal(size=toas_grandes.size)
+        # (si ninguno alcanzó a terminar se lanza RuntimeError)
+        inicio = time.time()
+        try:
+            _, telemetria = entrenamiento_gp_reinicios(toas_grandes, residuos_grandes, n_reinicios=4, n_procesos=2,
+                                                       tiempo_max=0.5)
+            assert telemetria["presupuesto_agotado"], "No se detectó el presupuesto agotado en paralelo."
+        except RuntimeError:
+            pass
+        log_lines.append(f"Reinicios con plazo en paralelo: {time.time() - inicio:.1f} s.")
+        assert not multiprocessing.active_children(), "Quedaron workers del pool corriendo."
+
+        # Los reinicios que fallan se registran aparte del presupuesto y, si fallan todos, se lanza
+        # RuntimeError (max_iters inválido hace fallar a L-BFGS-B dentro de cada worker)
+        for n_procesos in (1, 2):
+            try:
+                entrenamiento_gp_reinicios(toas, residuos, n_reinicios=2, n_procesos=n_procesos, max_iters="x")
+                raise AssertionError("Sin reinicios exitosos debería lanzar RuntimeError.")
+            except RuntimeError as e:
+                assert e.__cause__ is not None, "No se encadenó la excepción del reinicio fallido."
+        assert not multiprocessing.active_children(), "Quedaron workers del pool tras los fallos."
+
+        log_lines.append("La función entrenamiento_gp_reinicios pasó la prueba unitaria.")
+
+    except AssertionError as e:
+        log_lines.append(str(e))
+        raise
+
+    finally:
+        with open(log_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(log_lines))
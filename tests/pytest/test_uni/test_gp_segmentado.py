@@ -0,0 +1,57 @@
+import os
+import yaml
+import numpy as np
+from datetime import datetime
+from main.backend import detectar_segmentos, entrenamiento_gp_segmentado
+
+def test_gp_segmentado():
+    config_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "config.yaml"))
+    with open(config_path, "r") as f:
+        config = yaml.safe_load(f)
+
+    logs_dir = os.path.abspath(os.path.join(config["paths"]["logs_dir"], "gp_segmentado"))
+    os.makedirs(logs_dir, exist_ok=True)
+
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    log_path = os.path.join(logs_dir, f"log_gp_segmentado_{timestamp}.txt")
+    log_lines = []
+
+    try:
+        # Dos bloques de observación separados por un hueco grande
+        rng = np.random.default_rng(19)
+        toas = np.sort(np.r_[rng.uniform(0.0, 0.4, 150), rng.uniform(0.6, 1.0, 150)])
+        residuos = np.sin(6 * toas) + 0.02 * rng.normal(size=toas.size)
+
+        fronteras = detectar_segmentos(toas)
+        assert fronteras.size == 1 and 0.4 < fronteras[0] < 0.6, "No se detectó el hueco."
+        log_lines.append(f"Fronteras detectadas: {fronteras}")
+
+        # Los cortes del usuario se agregan; los que dejan segmentos pequeños se descartan
+        assert detectar_segmentos(toas, cortes=[0.2]).size == 2, "No se respetó el corte del usuario."
+        assert detectar_segmentos(toas, cortes=[0.001]).size == 1, "Se aceptó un segmento demasiado pequeño."
+
+        modelos = entrenamiento_gp_segmentado(toas, [residuos, 2 * residuos], n_procesos=2)
+        assert len(modelos) == 2 and len(modelos[0].modelos) == 2, "Número de modelos incorrecto."
+
+        x = np.linspace(0, 1, 300)
+        pesos = modelos[0].pesos(x)
+        assert np.allclose(pesos.sum(axis=0), 1.0) and np.all(pesos >= 0), "Los pesos no forman una partición de la unidad."
+
+        media, varianza = modelos[0].predict(x)
+        assert media.shape == (x.size, 1) and np.all(varianza >= 0), "Predicción con forma o varianza inválida."
+        dentro = (x < 0.38) | (x > 0.62)
+        assert np.max(np.abs(media.ravel()[dentro] - np.sin(6 * x[dentro]))) < 0.05, "El GP segmentado no reproduce la señal."
+        assert np.max(np.abs(np.diff(media.ravel()))) < 0.05, "La curva combinada no es continua."
+
+        media_2, _ = modelos[1].predict(x)
+        assert np.allclose(media_2, 2 * media, rtol=1e-2, atol=1e-2), "La segunda serie no es consistente."
+
+        log_lines.append("La función entrenamiento_gp_segmentado pasó la prueba unitaria.")
+
+    except AssertionError as e:
+        log_lines.append(str(e))
+        raise
+
+    finally:
+        with open(log_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(log_lines))
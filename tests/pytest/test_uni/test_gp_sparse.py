@@ -0,0 +1,44 @@
+import os
+import yaml
+import numpy as np
+from datetime import datetime
+from main.backend import entrenamiento_gp_model, obtener_frecuencia_total_y_errores
+
+def test_gp_sparse():
+    config_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "config.yaml"))
+    with open(config_path, "r") as f:
+        config = yaml.safe_load(f)
+
+    logs_dir = os.path.abspath(os.path.join(config["paths"]["logs_dir"], "gp_sparse"))
+    os.makedirs(logs_dir, exist_ok=True)
+
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    log_path = os.path.join(logs_dir, f"log_gp_sparse_{timestamp}.txt")
+    log_lines = []
+
+    try:
+        rng = np.random.default_rng(4)
+        toas = np.sort(rng.uniform(0, 1, 800))
+        residuos = np.sin(8 * toas) + 0.1 * rng.normal(size=toas.size)
+
+        denso = entrenamiento_gp_model(toas, residuos)
+
+        for inducidos in ("kmeans", "uniforme"):
+            sparse = entrenamiento_gp_model(toas, residuos, motor="sparse", n_inducidos=40, inducidos=inducidos)
+            assert sparse.Z.shape == (40, 1), "Número de puntos inducidos incorrecto."
+
+            f_sparse, arriba, abajo = obtener_frecuencia_total_y_errores(toas, sparse, f_base=10.0)
+            f_denso, _, _ = obtener_frecuencia_total_y_errores(toas, denso, f_base=10.0)
+            assert np.all(arriba >= abajo), "La banda de error del GP sparse es inválida."
+            assert np.allclose(f_sparse, f_denso, atol=0.03), f"El GP sparse ({inducidos}) difiere del denso."
+            log_lines.append(f"{inducidos}: diferencia máxima con el denso {np.abs(f_sparse - f_denso).max():.2e}")
+
+        log_lines.append("El motor sparse pasó la prueba unitaria.")
+
+    except AssertionError as e:
+        log_lines.append(str(e))
+        raise
+
+    finally:
+        with open(log_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(log_lines))
@@ -0,0 +1,94 @@
+import os
+import yaml
+import numpy as np
+from datetime import datetime
+from main.backend import func_braking_index, error_indice_frenado, indice_frenado_monte_carlo, crear_txt
+
+def test_indice_frenado_errores():
+    config_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "config.yaml"))
+    with open(config_path, "r") as f:
+        config = yaml.safe_load(f)
+
+    logs_dir = os.path.abspath(os.path.join(config["paths"]["logs_dir"], "indice_frenado_errores"))
+    os.makedirs(logs_dir, exist_ok=True)
+
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    log_path = os.path.join(logs_dir, f"log_indice_frenado_errores_{timestamp}.txt")
+    txt_path = os.path.join(logs_dir, f"resultados_{timestamp}.txt")
+    log_lines = []
+
+    try:
+        rng = np.random.default_rng(24)
+        N = 5000
+        f = 10 + 1e-6 * rng.normal(size=N)
+        df = -1e-12 * (1 + 0.1 * rng.normal(size=N))
+        d2f = 3e-24 * (1 + 0.1 * rng.normal(size=N))
+        df[0] = 0.0
+
+        # Vectorizado: coincide con la fórmula elemento a elemento y deja nan donde ḟ = 0
+        n = func_braking_index(f, df, d2f)
+        esperado = np.array([fi * d2fi / dfi ** 2 if dfi != 0 else np.nan for fi, dfi, d2fi in zip(f, df, d2f)])
+        assert n.shape == (N,) and np.isnan(n[0]), "Forma o nan incorrectos."
+        assert np.allclose(n[1:], esperado[1:], rtol=1e-12), "El índice vectorizado no coincide."
+
+        # Con errores relativos pequeños, el método delta y Monte Carlo coinciden
+        sigma_f, sigma_df, sigma_d2f = np.full(N, 1e-9), np.full(N, 1e-15), np.full(N, 3e-26)
+        n_delta, sigma_n = error_indice_frenado(f, df, d2f, sigma_f, sigma_df, sigma_d2f)
+        relativo = np.sqrt((sigma_f / f) ** 2 + (2 * sigma_df / df[1:].mean()) ** 2 + (sigma_d2f / d2f) ** 2)
+        assert np.allclose(n_delta[1:], n[1:]) and np.isnan(sigma_n[0]), "Método delta incorrecto."
+        assert np.allclose(sigma_n[1:] / np.abs(n[1:]), relativo[1:], rtol=0.3), "σₙ del método delta fuera de escala."
+
+        mediana, arriba, abajo = indice_frenado_monte_carlo(f[1:], df[1:], d2f[1:], sigma_f[1:], sigma_df[1:],
+                                                            sigma_d2f[1:], n_muestras=2000, tamano_lote=700)
+        cociente = ((arriba - abajo) / 2) / sigma_n[1:]
+        log_lines.append(f"σ_MC / σ_delta: mediana {np.median(cociente):.3f}")
+        assert np.all((abajo <= mediana) & (mediana <= arriba)), "Banda de Monte Carlo inválida."
+        assert abs(np.median(cociente) - 1) < 0.05, "Monte Carlo y método delta no coinciden."
+        assert np.median(np.abs(mediana - n[1:]) / sigma_n[1:]) < 0.1, "La mediana de Monte Carlo está sesgada."
+
+        # Con covarianza conjunta: diagonal equivale a las sigmas; con correlación el sorteo es conjunto
+        M = 2000
+        diagonal = np.zeros((M, 3, 3))
+        diagonal[:, [0, 1, 2], [0, 1, 2]] = np.stack([sigma_f[1:M + 1], sigma_df[1:M + 1], sigma_d2f[1:M + 1]]).T ** 2
+        conjunto = indice_frenado_monte_carlo(f[1:M + 1], df[1:M + 1], d2f[1:M + 1], sigma_f[1:M + 1], sigma_df[1:M + 1],
+                                              sigma_d2f[1:M + 1], n_muestras=2000, covarianza=diagonal)
+        assert np.median(np.abs(conjunto[0] - mediana[:M]) / sigma_n[1:M + 1]) < 0.1 and \
+            abs(np.median((conjunto[1] - conjunto[2]) / (arriba[:M] - abajo[:M])) - 1) < 0.05, \
+            "La covarianza diagonal no equivale a las sigmas."
+
+        rho = 0.9
+        correlacionada = diagonal.copy()
+        correlacionada[:, 1, 2] = correlacionada[:, 2, 1] = -rho * sigma_df[1:M + 1] * sigma_d2f[1:M + 1]
+        _, sigma_conjunta = error_indice_frenado(f[1:M + 1], df[1:M + 1], d2f[1:M + 1], sigma_f[1:M + 1], sigma_df[1:M + 1],
+                                                 sigma_d2f[1:M + 1], covarianza=correlacionada)
+        mediana_c, arriba_c, abajo_c = indice_frenado_monte_carlo(
+            f[1:M + 1], df[1:M + 1], d2f[1:M + 1], sigma_f[1:M + 1], sigma_df[1:M + 1], sigma_d2f[1:M + 1],
+            n_muestras=2000, covarianza=correlacionada)
+        cociente_c = ((arriba_c - abajo_c) / 2) / sigma_conjunta
+        log_lines.append(f"Con correlación ḟ-f̈ = -{rho}: σ_conjunta / σ_independiente = "
+                         f"{np.median(sigma_conjunta / sigma_n[1:M + 1]):.3f}, σ_MC / σ_delta = {np.median(cociente_c):.3f}")
+        assert np.median(sigma_conjunta / sigma_n[1:M + 1]) < 0.95, "La correlación no cambió el error de n."
+        assert abs(np.median(cociente_c) - 1) < 0.05, "Monte Carlo conjunto y método delta no coinciden."
+
+        # Un único lote que cubre todos los tiempos
+        otra = indice_frenado_monte_carlo(f[1:50], df[1:50], d2f[1:50], sigma_f[1:50], sigma_df[1:50],
+                                          sigma_d2f[1:50], n_muestras=500, tamano_lote=49, semilla=3)
+        assert all(np.all(np.isfinite(x)) for x in otra), "Monte Carlo con un solo lote produjo valores no finitos."
+
+        # Exportación: las columnas del índice de frenado se agregan al .txt
+        tiempo = np.linspace(55000, 56000, 10)
+        crear_txt(txt_path, tiempo, f[:10], f[:10], f[:10], df[:10], df[:10], df[:10], d2f[:10], d2f[:10], d2f[:10],
+                  n=n[:10], n_err_up=arriba[:10], n_err_down=abajo[:10], n_sigma=sigma_n[:10])
+        datos = np.genfromtxt(txt_path, skip_header=1)
+        assert datos.shape == (10, 14), "El archivo no tiene las columnas del índice de frenado."
+        assert np.allclose(datos[1:, 10], n[1:10]), "El índice de frenado no se exportó correctamente."
+
+        log_lines.append("Las funciones del índice de frenado pasaron la prueba unitaria.")
+
+    except AssertionError as e:
+        log_lines.append(str(e))
+        raise
+
+    finally:
+        with open(log_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(log_lines))
@@ -0,0 +1,47 @@
+import os
+import yaml
+import numpy as np
+from datetime import datetime
+from main.backend import _construir_gp_model, _parametros_aleatorios
+
+def test_parametros_aleatorios():
+    config_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "config.yaml"))
+    with open(config_path, "r") as f:
+        config = yaml.safe_load(f)
+
+    logs_dir = os.path.abspath(os.path.join(config["paths"]["logs_dir"], "parametros_aleatorios"))
+    os.makedirs(logs_dir, exist_ok=True)
+
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    log_path = os.path.join(logs_dir, f"log_parametros_aleatorios_{timestamp}.txt")
+    log_lines = []
+
+    try:
+        toas = np.linspace(0, 1, 80)
+        residuos = np.sin(8 * toas) * np.exp(-toas)
+        modelo = _construir_gp_model(toas, residuos, kernel="cuasi_periodico")
+        nombres = list(modelo.parameter_names_flat(include_fixed=True))
+        fijo = next(i for i, nombre in enumerate(nombres) if "std_periodic.variance" in nombre)
+        ruido = next(i for i, nombre in enumerate(nombres) if "Gaussian_noise" in nombre)
+        escala = np.var(residuos)
+
+        rng = np.random.default_rng(4)
+        for _ in range(20):
+            p = _parametros_aleatorios(modelo, residuos, np.ptp(toas), rng)
+            # La varianza del periódico está fija: ni se sobrescribe ni corre a los demás parámetros
+            assert p[fijo] == modelo.param_array[fijo], "Se sobrescribió el parámetro fijo."
+            assert 1e-4 * escala <= p[ruido] <= escala, "El ruido no se sorteó en su rango."
+            assert np.all(np.delete(p, fijo) != np.delete(modelo.param_array, fijo)), "Quedaron parámetros libres sin sortear."
+
+            modelo[:] = p
+            assert np.isfinite(modelo.log_likelihood()), "Los parámetros sorteados no son válidos."
+
+        log_lines.append("La función _parametros_aleatorios pasó la prueba unitaria.")
+
+    except AssertionError as e:
+        log_lines.append(str(e))
+        raise
+
+    finally:
+        with open(log_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(log_lines))
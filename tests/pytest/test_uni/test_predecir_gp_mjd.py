@@ -0,0 +1,60 @@
+import os
+import yaml
+import tracemalloc
+import numpy as np
+from datetime import datetime
+from main.backend import predecir_gp_mjd, entrenamiento_gp_model, normalizar_tiempos
+
+def test_predecir_gp_mjd():
+    config_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "config.yaml"))
+    with open(config_path, "r") as f:
+        config = yaml.safe_load(f)
+
+    logs_dir = os.path.abspath(os.path.join(config["paths"]["logs_dir"], "predecir_gp_mjd"))
+    os.makedirs(logs_dir, exist_ok=True)
+
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    log_path = os.path.join(logs_dir, f"log_predecir_gp_mjd_{timestamp}.txt")
+    log_lines = []
+
+    try:
+        rng = np.random.default_rng(21)
+        mjds = np.sort(rng.uniform(50000, 57300, 500))
+        residuos = np.sin((mjds - 50000) / 300) + 0.05 * rng.normal(size=mjds.size)
+
+        norm_toas, t_ref, t_scale = normalizar_tiempos(mjds)
+        modelo = entrenamiento_gp_model(norm_toas, residuos)
+
+        # En los TOAs de entrenamiento coincide con la predicción directa
+        media, varianza = predecir_gp_mjd(modelo, mjds, t_ref, t_scale, tamano_bloque=64)
+        media_directa, varianza_directa = modelo.predict(norm_toas)
+        assert np.allclose(media, media_directa.ravel()) and np.allclose(varianza, varianza_directa.ravel()), "La predicción por bloques no coincide."
+
+        # Grilla densa: la memoria temporal depende del bloque y no del número de puntos
+        grilla = np.linspace(50000, 57300, 50_000)
+        tracemalloc.start()
+        media_serie, varianza_serie = predecir_gp_mjd(modelo, grilla, t_ref, t_scale, tamano_bloque=1000)
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        completa = grilla.size * mjds.size * 8
+        log_lines.append(f"Pico de memoria: {pico / 1e6:.1f} MB (covarianza cruzada completa: {completa / 1e6:.1f} MB)")
+        assert pico < 0.1 * completa, "La memoria no quedó acotada por el bloque."
+
+        # Con hilos el resultado es el mismo
+        media_hilos, varianza_hilos = predecir_gp_mjd(modelo, grilla, t_ref, t_scale, tamano_bloque=1000, n_hilos=4)
+        assert np.allclose(media_hilos, media_serie) and np.allclose(varianza_hilos, varianza_serie), "La predicción con hilos no coincide."
+
+        # Salida preasignada
+        salida = (np.zeros(grilla.size), np.zeros(grilla.size))
+        predecir_gp_mjd(modelo, grilla, t_ref, t_scale, salida=salida)
+        assert np.allclose(salida[0], media_serie), "No se escribió en la salida preasignada."
+
+        log_lines.append("La función predecir_gp_mjd pasó la prueba unitaria.")
+
+    except AssertionError as e:
+        log_lines.append(str(e))
+        raise
+
+    finally:
+        with open(log_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(log_lines))
@@ -0,0 +1,63 @@
+import os
+import yaml
+import numpy as np
+from datetime import datetime
+from main.backend import predecir_gp_mjd, normalizar_tiempos, GPEspacioEstados, GPSegmentado
+
+def test_prediccion_estado_una_pasada():
+    config_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "config.yaml"))
+    with open(config_path, "r") as f:
+        config = yaml.safe_load(f)
+
+    logs_dir = os.path.abspath(os.path.join(config["paths"]["logs_dir"], "prediccion_estado_una_pasada"))
+    os.makedirs(logs_dir, exist_ok=True)
+
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    log_path = os.path.join(logs_dir, f"log_prediccion_estado_una_pasada_{timestamp}.txt")
+    log_lines = []
+
+    try:
+        rng = np.random.default_rng(8)
+        mjds = np.sort(rng.uniform(50000, 57300, 2000))
+        residuos = np.sin((mjds - 50000) / 300) + 0.05 * rng.normal(size=mjds.size)
+        norm_toas, t_ref, t_scale = normalizar_tiempos(mjds)
+        modelo = GPEspacioEstados(norm_toas, residuos, kernel="matern32", lengthscale=0.05, noise_variance=0.0025)
+
+        # Se cuentan las llamadas a predict y las pasadas del filtro sobre los datos
+        llamadas = {"predict": 0, "filtro": 0}
+        predict, recorrer = modelo.predict, modelo._recorrer
+
+        def contar_predict(*args, **kwargs):
+            llamadas["predict"] += 1
+            return predict(*args, **kwargs)
+
+        def contar_filtro(*args, **kwargs):
+            llamadas["filtro"] += 1
+            return recorrer(*args, **kwargs)
+
+        modelo.predict, modelo._recorrer = contar_predict, contar_filtro
+
+        grilla = np.linspace(50000, 57300, 50_000)
+        media, varianza = predecir_gp_mjd(modelo, grilla, t_ref, t_scale, tamano_bloque=256, n_hilos=4)
+        log_lines.append(f"Llamadas a predict: {llamadas['predict']}, pasadas del filtro: {llamadas['filtro']}")
+        assert llamadas == {"predict": 1, "filtro": 1}, "El motor estado se partió en bloques."
+
+        media_directa, varianza_directa = predict((grilla - t_ref) / t_scale)
+        assert np.allclose(media, media_directa.ravel()) and np.allclose(varianza, varianza_directa.ravel()), \
+            "La predicción en una pasada no coincide con la directa."
+
+        # Un GP segmentado de motores estado tampoco se parte: una pasada por segmento
+        llamadas.update(predict=0, filtro=0)
+        segmentado = GPSegmentado([modelo], [], [])
+        predecir_gp_mjd(segmentado, grilla, t_ref, t_scale)
+        assert llamadas == {"predict": 1, "filtro": 1}, "El GP segmentado de motores estado se partió en bloques."
+
+        log_lines.append("La predicción en una pasada del motor estado pasó la prueba unitaria.")
+
+    except AssertionError as e:
+        log_lines.append(str(e))
+        raise
+
+    finally:
+        with open(log_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(log_lines))
@@ -0,0 +1,46 @@
+import os
+import yaml
+import numpy as np
+from datetime import datetime
+from main.backend import promediar_epocas, binning_adaptativo
+
+def test_promediar_epocas():
+    config_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "config.yaml"))
+    with open(config_path, "r") as f:
+        config = yaml.safe_load(f)
+
+    logs_dir = os.path.abspath(os.path.join(config["paths"]["logs_dir"], "promediar_epocas"))
+    os.makedirs(logs_dir, exist_ok=True)
+
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    log_path = os.path.join(logs_dir, f"log_promediar_epocas_{timestamp}.txt")
+    log_lines = []
+
+    try:
+        x = np.array([5.0, 1.0, 1.1, 1.2, 5.05, 9.0])
+        y = np.array([4.0, 1.0, 2.0, 3.0, 5.0, 6.0])
+        errores = np.array([1.0, 1.0, 1.0, 1.0, 2.0, 1.0])
+
+        x_ep, y_ep, err_ep = promediar_epocas(x, y, errores, tolerancia=0.5)
+        assert x_ep.size == 3, "Número de épocas incorrecto."
+        assert np.allclose(y_ep, [2.0, 4.2, 6.0]), "El promedio ponderado es incorrecto."
+        assert np.allclose(err_ep, [1 / np.sqrt(3), 1 / np.sqrt(1.25), 1.0]), "La incertidumbre combinada es incorrecta."
+        assert np.all(np.diff(x_ep) > 0), "Las épocas no están ordenadas."
+
+        rng = np.random.default_rng(2)
+        x = np.sort(rng.uniform(0, 100, 1000))
+        y = rng.normal(size=1000)
+        errores = rng.uniform(0.5, 2.0, 1000)
+        x_b, y_b, err_b = binning_adaptativo(x, y, errores, n_objetivo=100)
+        assert 90 <= x_b.size <= 100, "El binning no se acercó al número objetivo de puntos."
+        assert np.isclose(np.sum(1 / err_b ** 2), np.sum(1 / errores ** 2)), "El binning perdió peso estadístico."
+
+        log_lines.append("Las funciones promediar_epocas y binning_adaptativo pasaron la prueba unitaria.")
+
+    except AssertionError as e:
+        log_lines.append(str(e))
+        raise
+
+    finally:
+        with open(log_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(log_lines))
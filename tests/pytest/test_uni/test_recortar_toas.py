@@ -0,0 +1,48 @@
+import os
+import yaml
+import pytest
+from datetime import datetime
+from main.backend import load_toas, recortar_toas
+
+def test_recortar_toas():
+    config_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "config.yaml"))
+    with open(config_path, "r") as f:
+        config = yaml.safe_load(f)
+
+    files_dir = os.path.abspath(config["paths"]["files_dir"])
+    logs_dir = os.path.abspath(os.path.join(config["paths"]["logs_dir"], "recortar_toas"))
+    os.makedirs(logs_dir, exist_ok=True)
+
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    log_path = os.path.join(logs_dir, f"log_recortar_toas_{timestamp}.txt")
+    log_lines = []
+
+    tim_path = os.path.join(files_dir, "psr04.tim")
+
+    try:
+        mjds, toas = load_toas(tim_path, return_also_mjds=True)
+
+        assert recortar_toas(toas) is toas, "Sin ventana no se debe copiar el objeto TOAs."
+
+        inicio, fin = 60000.0, 60200.0
+        sub = recortar_toas(toas, inicio, fin)
+        esperados = ((mjds.value >= inicio) & (mjds.value <= fin)).sum()
+        assert sub.ntoas == esperados, "El número de TOAs en la ventana no es el esperado."
+        assert sub.get_mjds().value.min() >= inicio, "Hay TOAs antes del inicio de la ventana."
+        assert sub.get_mjds().value.max() <= fin, "Hay TOAs después del final de la ventana."
+        log_lines.append(f"Ventana [{inicio}, {fin}]: {sub.ntoas} de {toas.ntoas} TOAs.")
+
+        with pytest.raises(ValueError):
+            recortar_toas(toas, fin, inicio)
+        with pytest.raises(ValueError):
+            recortar_toas(toas, 10.0, 20.0)
+
+        log_lines.append("La función recortar_toas pasó la prueba unitaria.")
+
+    except AssertionError as e:
+        log_lines.append(str(e))
+        raise
+
+    finally:
+        with open(log_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(log_lines))
@@ -0,0 +1,47 @@
+import os
+import yaml
+from datetime import datetime
+from main.backend import load_toas_sesion, get_model_sesion, compute_residuals_sesion, limpiar_registro_sesion
+
+def test_registro_sesion():
+    config_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "config.yaml"))
+    with open(config_path, "r") as f:
+        config = yaml.safe_load(f)
+
+    files_dir = os.path.abspath(config["paths"]["files_dir"])
+    logs_dir = os.path.abspath(os.path.join(config["paths"]["logs_dir"], "registro_sesion"))
+    os.makedirs(logs_dir, exist_ok=True)
+
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    log_path = os.path.join(logs_dir, f"log_registro_sesion_{timestamp}.txt")
+    log_lines = []
+
+    tim_path = os.path.join(files_dir, "psr04.tim")
+    par_path = os.path.join(files_dir, "psr04.par")
+
+    try:
+        limpiar_registro_sesion()
+
+        _, toas_1 = load_toas_sesion(tim_path)
+        toas_2 = load_toas_sesion(tim_path, return_also_mjds=False)
+        assert toas_1 is toas_2, "El .tim se cargó dos veces en la misma sesión."
+
+        model_1 = get_model_sesion(par_path)
+        assert get_model_sesion(par_path) is model_1, "El .par se parseó dos veces en la misma sesión."
+
+        residuals_1, model = compute_residuals_sesion(par_path, tim_path)
+        residuals_2, _ = compute_residuals_sesion(par_path, tim_path)
+        assert residuals_1 is residuals_2, "Los residuos se calcularon dos veces."
+        assert model is model_1, "Los residuos no usaron el modelo compartido."
+        assert residuals_1.toas is toas_1, "Los residuos no usaron los TOAs compartidos."
+
+        log_lines.append("El registro de sesión pasó la prueba unitaria.")
+
+    except AssertionError as e:
+        log_lines.append(str(e))
+        raise
+
+    finally:
+        limpiar_registro_sesion()
+        with open(log_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(log_lines))
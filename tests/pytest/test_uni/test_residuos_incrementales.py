@@ -0,0 +1,53 @@
+import os
+import copy
+import yaml
+import numpy as np
+import astropy.units as u
+import pint.residuals as res
+from datetime import datetime
+from main.backend import load_toas, preparar_residuos_incrementales, actualizar_residuos
+
+def test_residuos_incrementales():
+    config_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "config.yaml"))
+    with open(config_path, "r") as f:
+        config = yaml.safe_load(f)
+
+    files_dir = os.path.abspath(config["paths"]["files_dir"])
+    logs_dir = os.path.abspath(os.path.join(config["paths"]["logs_dir"], "residuos_incrementales"))
+    os.makedirs(logs_dir, exist_ok=True)
+
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    log_path = os.path.join(logs_dir, f"log_residuos_incrementales_{timestamp}.txt")
+    log_lines = []
+
+    tim_path = os.path.join(files_dir, "psr04.tim")
+    par_path = os.path.join(files_dir, "psr04.par")
+
+    try:
+        toas = load_toas(tim_path, return_also_mjds=False)
+        estado = preparar_residuos_incrementales(par_path, toas, parametros=["F0", "F1"])
+
+        # Cambio pequeño: actualización lineal, debe coincidir con el cálculo completo
+        nuevo_f1 = estado["model"].F1.value * (1 + 1e-6)
+        residuos_lin, lineal = actualizar_residuos(estado, {"F1": nuevo_f1})
+        assert lineal, "Un cambio pequeño debería resolverse con la aproximación lineal."
+
+        model_exacto = copy.deepcopy(estado["model"])
+        model_exacto.F1.value = nuevo_f1
+        residuos_exactos = res.Residuals(toas, model_exacto).time_resids.to(u.s).value
+        assert np.allclose(residuos_lin, residuos_exactos, atol=1e-6), "La actualización lineal difiere del cálculo completo."
+        log_lines.append(f"Diferencia máxima lineal vs exacto: {np.abs(residuos_lin - residuos_exactos).max():.3e} s")
+
+        # Cambio grande: recálculo completo
+        _, lineal = actualizar_residuos(estado, {"F0": estado["model"].F0.value + 1e-3})
+        assert not lineal, "Un cambio grande debería forzar el recálculo completo."
+
+        log_lines.append("El modo de residuos incrementales pasó la prueba unitaria.")
+
+    except AssertionError as e:
+        log_lines.append(str(e))
+        raise
+
+    finally:
+        with open(log_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(log_lines))
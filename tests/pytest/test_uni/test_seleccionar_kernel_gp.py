@@ -0,0 +1,49 @@
+import os
+import yaml
+import numpy as np
+from datetime import datetime
+from main.backend import seleccionar_kernel_gp, entrenamiento_gp_model, KERNELS_GP
+
+def test_seleccionar_kernel_gp():
+    config_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "config.yaml"))
+    with open(config_path, "r") as f:
+        config = yaml.safe_load(f)
+
+    logs_dir = os.path.abspath(os.path.join(config["paths"]["logs_dir"], "seleccionar_kernel_gp"))
+    os.makedirs(logs_dir, exist_ok=True)
+
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    log_path = os.path.join(logs_dir, f"log_seleccionar_kernel_gp_{timestamp}.txt")
+    log_lines = []
+
+    try:
+        rng = np.random.default_rng(17)
+        toas = np.sort(rng.uniform(0, 1, 200))
+        residuos = np.sin(12 * toas) + 0.05 * rng.normal(size=toas.size)
+
+        for criterio in ("loglik", "bic", "aic"):
+            modelo, tabla = seleccionar_kernel_gp(toas, residuos, criterio=criterio)
+            assert [fila["kernel"] for fila in tabla] and len(tabla) == len(KERNELS_GP), "Faltan kernels en la tabla."
+
+            if criterio == "loglik":
+                valores = [-fila["log_likelihood"] for fila in tabla]
+            else:
+                valores = [fila[criterio] for fila in tabla]
+            assert valores == sorted(valores), f"La tabla no está ordenada por {criterio}."
+            assert np.isclose(float(modelo.log_likelihood()), tabla[0]["log_likelihood"]), "El modelo no es el mejor de la tabla."
+            log_lines.append(f"{criterio}: mejor kernel {tabla[0]['kernel']}")
+
+        # El ajuste en paralelo debe coincidir con el ajuste directo del mismo kernel
+        _, tabla = seleccionar_kernel_gp(toas, residuos, kernels=["matern32"], n_procesos=1)
+        directo = entrenamiento_gp_model(toas, residuos, kernel="matern32")
+        assert np.isclose(tabla[0]["log_likelihood"], float(directo.log_likelihood())), "El ajuste del candidato no coincide."
+
+        log_lines.append("La función seleccionar_kernel_gp pasó la prueba unitaria.")
+
+    except AssertionError as e:
+        log_lines.append(str(e))
+        raise
+
+    finally:
+        with open(log_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(log_lines))
@@ -0,0 +1,43 @@
+import os
+import yaml
+import numpy as np
+from datetime import datetime
+from main.backend import frequency_residuals_func
+
+def test_spline_lsq():
+    config_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "config.yaml"))
+    with open(config_path, "r") as f:
+        config = yaml.safe_load(f)
+
+    logs_dir = os.path.abspath(os.path.join(config["paths"]["logs_dir"], "spline_lsq"))
+    os.makedirs(logs_dir, exist_ok=True)
+
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    log_path = os.path.join(logs_dir, f"log_spline_lsq_{timestamp}.txt")
+    log_lines = []
+
+    try:
+        rng = np.random.default_rng(1)
+        toas = np.sort(rng.uniform(0, 2000, 700))
+        errores = np.full(toas.size, 1e-3)
+
+        # Fase cúbica + ruido blanco: la 3ª derivada verdadera es constante (1e-9)
+        phase_resids = 1e-9 * (toas - 1000) ** 3 / 6 + 1e-6 * (toas - 1000) ** 2 + errores * rng.normal(size=toas.size)
+
+        _, _, _, d2f_interp = frequency_residuals_func(toas, phase_resids, n_points=50)
+        assert np.all(d2f_interp == 0), "El spline interpolante k=2 debería tener 3ª derivada nula."
+
+        t, f, df, d2f = frequency_residuals_func(toas, phase_resids, n_points=50, method="lsq", errores=errores)
+        assert np.allclose(df, 2e-6 + 1e-9 * (t - 1000), rtol=0.05, atol=5e-8), "La 2ª derivada del spline lsq es incorrecta."
+        assert np.allclose(np.median(d2f), 1e-9, rtol=0.1), "La 3ª derivada del spline lsq no recupera la señal."
+
+        log_lines.append(f"Mediana de la 3ª derivada: {np.median(d2f):.3e} (esperado 1e-9).")
+        log_lines.append("El spline de mínimos cuadrados pasó la prueba unitaria.")
+
+    except AssertionError as e:
+        log_lines.append(str(e))
+        raise
+
+    finally:
+        with open(log_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(log_lines))